@@ -0,0 +1,193 @@
+"""
+缓存工具模块
+提供带过期时间的LRU缓存，供各工具缓存外部接口查询结果；
+合并并发请求的SingleFlight，避免缓存未命中时同一键被重复查询；
+以及基于SQLite的持久化缓存，跨进程保存不会改变的查询结果（如已验证合约的源代码）
+"""
+
+import asyncio
+import sqlite3
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple, Union
+
+
+class TTLCache:
+    """带过期时间（TTL）的有界LRU缓存"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最大条目数，超出时淘汰最久未使用的条目
+            ttl: 条目有效期（秒）
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        获取缓存值
+
+        Args:
+            key: 缓存键
+            default: 未命中或已过期时的返回值
+
+        Returns:
+            缓存值
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        写入缓存值
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 该条目的有效期（秒），默认使用缓存的TTL
+        """
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        """清空缓存"""
+        self._data.clear()
+
+
+class SingleFlight:
+    """
+    合并同一键的并发异步请求：首个协程发起查询，所有协程等待并共享其结果
+
+    查询在独立的任务中执行，某个等待者被取消不会影响其他等待者；
+    只有全部等待者都被取消时才取消查询本身
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+    async def run(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行查询（同一键已有查询进行中时等待其结果）
+
+        Args:
+            key: 请求键
+            fetch: 执行实际查询的无参协程函数
+
+        Returns:
+            查询结果
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # 最后一个等待者被取消时，查询结果已无人需要；立即移除登记，之后的调用重新发起查询
+            if self._waiters.get(key) == 1 and self._inflight.get(key) is task:
+                del self._inflight[key]
+                del self._waiters[key]
+                task.cancel()
+            raise
+        finally:
+            if self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        """查询任务结束：移除登记，并标记异常已被获取，避免没有等待者时输出警告"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+        if not task.cancelled():
+            task.exception()
+
+
+class DiskCache:
+    """基于SQLite的持久化键值缓存，值为zlib压缩后的字节串"""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        打开（或创建）缓存数据库
+
+        Args:
+            path: SQLite数据库文件路径
+        """
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        # WAL模式下读写互不阻塞，多个进程可同时读取；NORMAL同步级别在WAL下仍保证一致性
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        获取缓存值
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            解压后的值，未命中时返回None
+        """
+        row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def set(self, key: str, value: bytes):
+        """
+        写入缓存值
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+        """
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                               (key, zlib.compress(value)))
+
+    def set_many(self, items: Iterable[Tuple[str, bytes]]):
+        """
+        在一个事务中批量写入缓存值（只提交一次）
+
+        Args:
+            items: (缓存键, 缓存值) 列表
+        """
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                                   ((key, zlib.compress(value)) for key, value in items))
+
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
+
+
+_MISSING = object()
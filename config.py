@@ -4,22 +4,90 @@
 """
 
 import os
-from typing import Optional, Any
+import re
+import atexit
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Any, Callable, Dict, Tuple
 from pathlib import Path
 
 
+# .env键值对：KEY=value（值两端的引号在解析后去除）；以#开头的注释行和空行不匹配
+_ENV_LINE_RE = re.compile(
+    r'^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*([^\n]*?)[ \t]*\r?$',
+    re.MULTILINE
+)
+
+# LOG_LEVEL配置值到logging级别的映射
+_LEVEL_MAP = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR
+}
+
+# 布尔型配置值中视为真的取值（小写）
+_TRUTHY = frozenset({'true', '1', 'yes', 'on'})
+
+
+def _parse_env_text(text: str) -> Dict[str, str]:
+    """
+    解析.env文件内容
+    
+    Args:
+        text: .env文件全文
+        
+    Returns:
+        键值对字典，同一键以首次出现为准
+    """
+    values: Dict[str, str] = {}
+    for key, value in _ENV_LINE_RE.findall(text):
+        # 移除两端成对的引号（值中间的同种引号保留）
+        if value[:1] in ('"', "'") and value.endswith(value[:1]):
+            value = value[1:-1]
+        values.setdefault(key, value)
+    return values
+
+
 class Config:
     """配置管理类"""
     
-    def __init__(self, env_file: Optional[str] = None):
+    __slots__ = (
+        'env_file', '_overrides', '_typed_cache',
+        '_web3_provider_url', '_etherscan_api_key', '_etherscan_base_url',
+        '_target_contract', '_max_workers', '_request_delay', '_default_block',
+        '_keep_essential_comments', '_output_dir', '_log_level', '_call_cache_mode',
+    )
+    
+    def __init__(self, env_file: Optional[str] = None, overrides: Optional[Dict[str, str]] = None):
         """
         初始化配置管理
         
         Args:
             env_file: .env文件路径，默认在当前目录查找
+            overrides: 优先于环境变量的配置值（仅对该实例生效，不修改os.environ）
         """
         self.env_file = env_file or self._find_env_file()
+        self._overrides: Dict[str, str] = dict(overrides or {})
+        # 已解析的配置值缓存，键为 (类型, 配置键名, 默认值)
+        self._typed_cache: Dict[Tuple[str, str, Any], Any] = {}
         self._load_env_file()
+        self._resolve_settings()
+    
+    def _resolve_settings(self):
+        """一次性解析常用配置项，属性访问直接读取槽字段"""
+        self._web3_provider_url = self.get_str('WEB3_PROVIDER_URL')
+        self._etherscan_api_key = self.get_str('ETHERSCAN_API_KEY')
+        self._etherscan_base_url = self.get_str('ETHERSCAN_BASE_URL', 'https://api.etherscan.io/api')
+        self._target_contract = self.get_str('TARGET_CONTRACT')
+        self._max_workers = self.get_int('MAX_WORKERS', 10)
+        self._request_delay = self.get_float('REQUEST_DELAY', 0.2)
+        self._default_block = self.get_str('DEFAULT_BLOCK', 'latest')
+        self._keep_essential_comments = self.get_bool('KEEP_ESSENTIAL_COMMENTS', True)
+        self._output_dir = self.get_str('OUTPUT_DIR', './analysis_results')
+        self._log_level = self.get_str('LOG_LEVEL', 'INFO')
+        self._call_cache_mode = self.get_str('CALL_CACHE_MODE', 'disabled')
     
     def _find_env_file(self) -> Optional[str]:
         """查找.env文件"""
@@ -42,28 +110,11 @@ class Config:
             return
         
         try:
-            with open(self.env_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    # 跳过注释和空行
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    # 解析键值对
-                    if '=' in line:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        value = value.strip()
-                        
-                        # 移除引号
-                        if value.startswith('"') and value.endswith('"'):
-                            value = value[1:-1]
-                        elif value.startswith("'") and value.endswith("'"):
-                            value = value[1:-1]
-                        
-                        # 设置环境变量（如果尚未设置）
-                        if key not in os.environ:
-                            os.environ[key] = value
+            data = Path(self.env_file).read_text(encoding='utf-8', errors='replace')
+            values = _parse_env_text(data)
+            
+            # 设置环境变量（如果尚未设置）
+            os.environ.update({key: value for key, value in values.items() if key not in os.environ})
             
             print(f"✅ 成功加载环境变量文件: {self.env_file}")
             
@@ -81,8 +132,61 @@ class Config:
         Returns:
             配置值
         """
+        if key in self._overrides:
+            return self._overrides[key]
         return os.environ.get(key, default)
     
+    def _get_cached(self, kind: str, key: str, default: Any, parse: Callable[[Any], Any]) -> Any:
+        """
+        获取解析后的配置值，首次读取后缓存
+        
+        Args:
+            kind: 值类型标识
+            key: 配置键名
+            default: 默认值
+            parse: 从原始值解析出目标值的函数
+            
+        Returns:
+            解析后的配置值
+        """
+        cache_key = (kind, key, default)
+        try:
+            return self._typed_cache[cache_key]
+        except KeyError:
+            pass
+        
+        value = parse(self.get(key, default))
+        self._typed_cache[cache_key] = value
+        return value
+    
+    def invalidate(self, key: Optional[str] = None):
+        """
+        使缓存的配置值失效（修改环境变量后调用）
+        
+        Args:
+            key: 配置键名，为空时清空全部缓存
+        """
+        if key is None:
+            self._typed_cache.clear()
+        else:
+            for cache_key in [k for k in self._typed_cache if k[1] == key]:
+                del self._typed_cache[cache_key]
+        
+        self._resolve_settings()
+    
+    def get_str(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """
+        获取字符串配置值（缓存）
+        
+        Args:
+            key: 配置键名
+            default: 默认值
+            
+        Returns:
+            字符串值
+        """
+        return self._get_cached('str', key, default, lambda value: value)
+    
     def get_bool(self, key: str, default: bool = False) -> bool:
         """
         获取布尔型配置值
@@ -94,8 +198,13 @@ class Config:
         Returns:
             布尔值
         """
-        value = self.get(key, str(default)).lower()
-        return value in ('true', '1', 'yes', 'on')
+        def parse(value: Any) -> bool:
+            # 未设置时得到的是布尔默认值本身，无需转换字符串
+            if isinstance(value, bool):
+                return value
+            return str(value).lower() in _TRUTHY
+        
+        return self._get_cached('bool', key, default, parse)
     
     def get_int(self, key: str, default: int = 0) -> int:
         """
@@ -108,10 +217,13 @@ class Config:
         Returns:
             整数值
         """
-        try:
-            return int(self.get(key, default))
-        except (ValueError, TypeError):
-            return default
+        def parse(value: Any) -> int:
+            try:
+                return int(value)
+            except (ValueError, TypeError):
+                return default
+        
+        return self._get_cached('int', key, default, parse)
     
     def get_float(self, key: str, default: float = 0.0) -> float:
         """
@@ -124,60 +236,68 @@ class Config:
         Returns:
             浮点值
         """
-        try:
-            return float(self.get(key, default))
-        except (ValueError, TypeError):
-            return default
+        def parse(value: Any) -> float:
+            try:
+                return float(value)
+            except (ValueError, TypeError):
+                return default
+        
+        return self._get_cached('float', key, default, parse)
     
     @property
     def web3_provider_url(self) -> Optional[str]:
         """Web3提供商URL"""
-        return self.get('WEB3_PROVIDER_URL')
+        return self._web3_provider_url
     
     @property
     def etherscan_api_key(self) -> Optional[str]:
         """Etherscan API密钥"""
-        return self.get('ETHERSCAN_API_KEY')
+        return self._etherscan_api_key
     
     @property
     def etherscan_base_url(self) -> str:
         """Etherscan API基础URL"""
-        return self.get('ETHERSCAN_BASE_URL', 'https://api.etherscan.io/api')
+        return self._etherscan_base_url
     
     @property
     def target_contract(self) -> Optional[str]:
         """目标合约地址"""
-        return self.get('TARGET_CONTRACT')
+        return self._target_contract
     
     @property
     def max_workers(self) -> int:
         """最大工作线程数"""
-        return self.get_int('MAX_WORKERS', 10)
+        return self._max_workers
     
     @property
     def request_delay(self) -> float:
         """请求延迟"""
-        return self.get_float('REQUEST_DELAY', 0.2)
+        return self._request_delay
     
     @property
     def default_block(self) -> str:
         """默认区块"""
-        return self.get('DEFAULT_BLOCK', 'latest')
+        return self._default_block
     
     @property
     def keep_essential_comments(self) -> bool:
         """是否保留重要注释"""
-        return self.get_bool('KEEP_ESSENTIAL_COMMENTS', True)
+        return self._keep_essential_comments
     
     @property
     def output_dir(self) -> str:
         """输出目录"""
-        return self.get('OUTPUT_DIR', './analysis_results')
+        return self._output_dir
     
     @property
     def log_level(self) -> str:
         """日志级别"""
-        return self.get('LOG_LEVEL', 'INFO')
+        return self._log_level
+    
+    @property
+    def call_cache_mode(self) -> str:
+        """状态快照eth_call结果的持久化缓存模式（enabled/readonly/replay/disabled）"""
+        return self._call_cache_mode
     
     def validate_config(self) -> dict:
         """
@@ -223,30 +343,41 @@ class Config:
         print(f"   保留重要注释: {self.keep_essential_comments}")
         print(f"   输出目录: {self.output_dir}")
         print(f"   日志级别: {self.log_level}")
+        print(f"   调用缓存模式: {self.call_cache_mode}")
 
 
 # 全局配置实例
 config = Config()
 
+# 日志队列的后台输出线程（首次调用setup_logging时启动）
+_log_listener: Optional[QueueListener] = None
+
 
 def setup_logging():
-    """设置日志"""
-    import logging
-    
-    level_mapping = {
-        'DEBUG': logging.DEBUG,
-        'INFO': logging.INFO,
-        'WARNING': logging.WARNING,
-        'ERROR': logging.ERROR
-    }
-    
-    level = level_mapping.get(config.log_level.upper(), logging.INFO)
-    
-    logging.basicConfig(
-        level=level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    """
+    设置日志
+    
+    根日志器只把记录放入队列，由后台线程写入stderr，
+    并发分析时记录日志不会因输出流的写入而阻塞事件循环。
+    """
+    global _log_listener
+    
+    root = logging.getLogger()
+    # 与logging.basicConfig一致：根日志器已有处理器时不做修改
+    if _log_listener is None and not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+        
+        log_queue = queue.SimpleQueue()
+        _log_listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+        
+        root.addHandler(QueueHandler(log_queue))
+        root.setLevel(_LEVEL_MAP.get(config.log_level.upper(), logging.INFO))
     
     return logging.getLogger(__name__)
 
@@ -4,7 +4,9 @@
 通过指定合约地址和链名称，提取A1描述中的所有关键信息到JSON
 
 使用方法:
-python extract_contract_data.py <contract_address> <chain_name>
+python extract_contract_data.py <contract_address> <chain_name> [--raw]
+
+--raw: 在结果中附带完整的原始分析数据
 
 支持的链:
 - eth: 以太坊主网
@@ -15,13 +17,12 @@ python extract_contract_data.py <contract_address> <chain_name>
 
 import asyncio
 import sys
-import json
 import time
 from typing import Dict, Any, Optional
-from dataclasses import asdict
 
 # 导入我们的工具
-from config import config, setup_logging
+from config import Config, setup_logging
+from json_utils import write_json_async
 from smart_contract_analyzer import SmartContractAnalyzer
 
 # 设置日志
@@ -55,35 +56,70 @@ CHAIN_CONFIGS = {
     }
 }
 
+# 构造参数分类关键字（匹配小写的参数名）
+_FEE_KEYWORDS = ("fee", "rate")
+_ACCESS_KEYWORDS = ("owner", "admin")
+
+# 按链缓存的配置实例，同一条链只构建一次
+_CONFIG_CACHE: Dict[str, Config] = {}
+
+
+def _build_config_for_chain(chain_config: Dict[str, str]) -> Config:
+    """
+    构建指定链的配置（链相关的值作为覆盖项传入，不修改os.environ）
+    
+    Args:
+        chain_config: CHAIN_CONFIGS中的链配置
+        
+    Returns:
+        配置实例
+    """
+    return Config(overrides={
+        'WEB3_PROVIDER_URL': chain_config['rpc_url'],
+        'ETHERSCAN_BASE_URL': chain_config['explorer_api']
+    })
+
 class ContractDataExtractor:
     """合约数据提取器"""
     
-    def __init__(self, chain_name: str):
+    def __init__(self, chain_name: str, include_raw: bool = False):
         """
         初始化数据提取器
         
         Args:
             chain_name: 链名称 (eth, bsc, polygon, arbitrum)
+            include_raw: 是否在结果中附带完整的原始分析数据（raw_analysis）
         """
         if chain_name.lower() not in CHAIN_CONFIGS:
             raise ValueError(f"不支持的链: {chain_name}. 支持的链: {list(CHAIN_CONFIGS.keys())}")
         
         self.chain_name = chain_name.lower()
         self.chain_config = CHAIN_CONFIGS[self.chain_name]
+        self.include_raw = include_raw
         
-        # 设置环境变量
-        import os
-        os.environ['WEB3_PROVIDER_URL'] = self.chain_config['rpc_url']
-        os.environ['ETHERSCAN_BASE_URL'] = self.chain_config['explorer_api']
+        # 获取该链的配置（每条链只构建一次）
+        self.config = _CONFIG_CACHE.get(self.chain_name)
+        if self.config is None:
+            self.config = _CONFIG_CACHE.setdefault(self.chain_name, _build_config_for_chain(self.chain_config))
         
-        # 重新加载配置
-        from config import load_config_from_env
-        global config
-        config = load_config_from_env()
+        # 分析器在首次提取时创建，之后各地址复用（共享HTTP连接池和进程池）
+        self.analyzer: Optional[SmartContractAnalyzer] = None
         
-        print(f"🔗 初始化 {self.chain_config['name']} 网络")
-        print(f"📡 RPC: {self.chain_config['rpc_url']}")
-        print(f"🔍 浏览器API: {self.chain_config['explorer_name']}")
+        logger.info(f"🔗 初始化 {self.chain_config['name']} 网络")
+        logger.info(f"📡 RPC: {self.chain_config['rpc_url']}")
+        logger.info(f"🔍 浏览器API: {self.chain_config['explorer_name']}")
+    
+    async def aclose(self):
+        """释放分析器持有的HTTP会话和进程池"""
+        if self.analyzer is not None:
+            await self.analyzer.aclose()
+            self.analyzer = None
+    
+    async def __aenter__(self) -> "ContractDataExtractor":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
     
     async def extract_all_data(self, contract_address: str) -> Dict[str, Any]:
         """
@@ -95,18 +131,19 @@ class ContractDataExtractor:
         Returns:
             包含所有提取数据的字典
         """
-        print(f"\n🚀 开始提取合约数据: {contract_address}")
-        print(f"🌐 网络: {self.chain_config['name']}")
-        print("=" * 80)
+        logger.info(f"🚀 开始提取合约数据: {contract_address}")
+        logger.info(f"🌐 网络: {self.chain_config['name']}")
         
         start_time = time.time()
         
         try:
-            # 初始化分析器
-            analyzer = SmartContractAnalyzer()
+            # 初始化分析器（首次调用时创建，由aclose释放）
+            if self.analyzer is None:
+                self.analyzer = SmartContractAnalyzer(settings=self.config)
             
             # 执行全面分析
-            analysis = await analyzer.comprehensive_analysis(contract_address)
+            analysis = await self.analyzer.comprehensive_analysis(contract_address)
+            await self.analyzer.resolve_constructor_names(analysis)
             
             end_time = time.time()
             
@@ -143,18 +180,25 @@ class ContractDataExtractor:
         # 4. 代码清理分析 (Code Sanitizer Tool)
         code_analysis = self._extract_code_info(analysis.sanitized_code, analysis.contract_info)
         
-        # 综合分析摘要
-        analysis_summary = self._build_analysis_summary(analysis)
+        # 综合分析摘要（复用上面已提取的各部分结果）
+        analysis_summary = self._build_analysis_summary(
+            analysis, proxy_analysis, constructor_analysis, state_analysis, code_analysis
+        )
         
-        return {
+        extracted_data = {
             "basic_info": basic_info,
             "proxy_analysis": proxy_analysis,
             "constructor_analysis": constructor_analysis,
             "state_analysis": state_analysis,
             "code_analysis": code_analysis,
-            "analysis_summary": analysis_summary,
-            "raw_analysis": asdict(analysis)  # 完整的原始数据
+            "analysis_summary": analysis_summary
         }
+        
+        # 完整的原始数据（直接保留dataclass，保存时再序列化，避免asdict深拷贝）
+        if self.include_raw:
+            extracted_data["raw_analysis"] = analysis
+        
+        return extracted_data
     
     def _extract_proxy_info(self, contract_info) -> Dict[str, Any]:
         """提取代理合约信息"""
@@ -167,14 +211,13 @@ class ContractDataExtractor:
             "executable_logic_access": False
         }
         
-        if contract_info.proxy_info:
-            proxy_data.update({
-                "proxy_type": contract_info.proxy_info.proxy_type,
-                "implementation_address": contract_info.proxy_info.implementation_address,
-                "admin_address": contract_info.proxy_info.admin_address,
-                "beacon_address": contract_info.proxy_info.beacon_address,
-                "executable_logic_access": contract_info.proxy_info.implementation_address != "0x0000000000000000000000000000000000000000"
-            })
+        proxy_info = contract_info.proxy_info
+        if proxy_info:
+            proxy_data["proxy_type"] = proxy_info.proxy_type
+            proxy_data["implementation_address"] = proxy_info.implementation_address
+            proxy_data["admin_address"] = proxy_info.admin_address
+            proxy_data["beacon_address"] = proxy_info.beacon_address
+            proxy_data["executable_logic_access"] = proxy_info.implementation_address != "0x0000000000000000000000000000000000000000"
         
         return proxy_data
     
@@ -190,44 +233,42 @@ class ContractDataExtractor:
         }
         
         if deployment_info:
-            constructor_data.update({
-                "deployer_address": deployment_info.deployer_address,
-                "deployment_block": deployment_info.block_number,
-                "gas_used": deployment_info.gas_used
-            })
+            constructor_data["deployer_address"] = deployment_info.deployer_address
+            constructor_data["deployment_block"] = deployment_info.block_number
+            constructor_data["gas_used"] = deployment_info.gas_used
             
             # 提取初始化参数
-            for param in deployment_info.constructor_params:
-                param_info = {
+            params = deployment_info.constructor_params
+            value_strs = [str(param.value) for param in params]
+            constructor_data["initialization_parameters"] = [
+                {
                     "name": param.name,
                     "type": param.type,
-                    "value": str(param.value),
+                    "value": value_str,
                     "decoded_value": param.decoded_value
                 }
-                constructor_data["initialization_parameters"].append(param_info)
-                
-                # 分类配置上下文
+                for param, value_str in zip(params, value_strs)
+            ]
+            
+            # 分类配置上下文（分类列表在首次出现时创建，保持原有键顺序）
+            context = constructor_data["configuration_context"]
+            
+            for param, value_str in zip(params, value_strs):
                 if param.type == "address":
-                    if "token_addresses" not in constructor_data["configuration_context"]:
-                        constructor_data["configuration_context"]["token_addresses"] = []
-                    constructor_data["configuration_context"]["token_addresses"].append({
-                        "parameter": param.name,
-                        "address": param.decoded_value or str(param.value)
-                    })
-                elif "fee" in param.name.lower() or "rate" in param.name.lower():
-                    if "fee_specifications" not in constructor_data["configuration_context"]:
-                        constructor_data["configuration_context"]["fee_specifications"] = []
-                    constructor_data["configuration_context"]["fee_specifications"].append({
-                        "parameter": param.name,
-                        "value": param.decoded_value or str(param.value)
-                    })
-                elif "owner" in param.name.lower() or "admin" in param.name.lower():
-                    if "access_control" not in constructor_data["configuration_context"]:
-                        constructor_data["configuration_context"]["access_control"] = []
-                    constructor_data["configuration_context"]["access_control"].append({
-                        "parameter": param.name,
-                        "address": param.decoded_value or str(param.value)
-                    })
+                    bucket, field = "token_addresses", "address"
+                else:
+                    name_lower = param.name.lower()
+                    if any(keyword in name_lower for keyword in _FEE_KEYWORDS):
+                        bucket, field = "fee_specifications", "value"
+                    elif any(keyword in name_lower for keyword in _ACCESS_KEYWORDS):
+                        bucket, field = "access_control", "address"
+                    else:
+                        continue
+                
+                context.setdefault(bucket, []).append({
+                    "parameter": param.name,
+                    field: param.decoded_value or value_str
+                })
         
         return constructor_data
     
@@ -245,24 +286,24 @@ class ContractDataExtractor:
         }
         
         if state_snapshot:
-            state_data.update({
-                "block_number": state_snapshot.block_number,
-                "timestamp": state_snapshot.timestamp,
-                "view_functions_identified": len(state_snapshot.view_functions),
-                "successful_calls": len(state_snapshot.state_data),
-                "failed_calls": len(state_snapshot.failed_calls),
-                "state_data": state_snapshot.state_data
-            })
+            state_data["block_number"] = state_snapshot.block_number
+            state_data["timestamp"] = state_snapshot.timestamp
+            state_data["view_functions_identified"] = len(state_snapshot.view_functions)
+            state_data["successful_calls"] = len(state_snapshot.state_data)
+            state_data["failed_calls"] = len(state_snapshot.failed_calls)
+            state_data["state_data"] = state_snapshot.state_data
             
             # 提取函数签名
-            for func in state_snapshot.view_functions:
-                state_data["function_signatures"].append({
+            state_data["function_signatures"] = [
+                {
                     "name": func.name,
                     "signature": func.signature,
                     "selector": func.selector,
                     "inputs": func.inputs,
                     "outputs": func.outputs
-                })
+                }
+                for func in state_snapshot.view_functions
+            ]
         
         return state_data
     
@@ -289,44 +330,43 @@ class ContractDataExtractor:
             code_data["original_size_bytes"] = len(contract_info.source_code)
         
         if sanitized_code:
-            code_data.update({
-                "sanitized_size_bytes": len(sanitized_code.sanitized_code),
-                "size_reduction_bytes": sanitized_code.optimization_summary["size_reduction"],
-                "size_reduction_percent": sanitized_code.optimization_summary["size_reduction_percent"],
-                "sanitized_code": sanitized_code.sanitized_code,
-                "removed_elements": {
-                    "comments": sanitized_code.optimization_summary["removed_comments"],
-                    "functions": sanitized_code.optimization_summary["removed_functions"],
-                    "imports": sanitized_code.optimization_summary["removed_imports"],
-                    "variables": sanitized_code.optimization_summary["removed_variables"]
-                }
-            })
+            code_data["sanitized_size_bytes"] = sanitized_code.sanitized_size
+            code_data["size_reduction_bytes"] = sanitized_code.size_reduction
+            code_data["size_reduction_percent"] = sanitized_code.size_reduction_percent
+            code_data["sanitized_code"] = sanitized_code.sanitized_code
+            code_data["removed_elements"] = {
+                "comments": sanitized_code.removed_comment_count,
+                "functions": len(sanitized_code.removed_functions),
+                "imports": len(sanitized_code.removed_imports),
+                "variables": len(sanitized_code.removed_variables)
+            }
         
         return code_data
     
-    def _build_analysis_summary(self, analysis) -> Dict[str, Any]:
-        """构建分析摘要"""
+    def _build_analysis_summary(self, analysis, proxy_analysis: Dict[str, Any], constructor_analysis: Dict[str, Any],
+                                state_analysis: Dict[str, Any], code_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """构建分析摘要（各工具的执行结果取自已提取的对应部分）"""
         return {
             "tools_execution": {
                 "source_code_fetcher": {
                     "executed": True,
                     "success": analysis.contract_info is not None,
-                    "proxy_detected": analysis.contract_info.proxy_info is not None
+                    "proxy_detected": proxy_analysis["is_proxy"]
                 },
                 "constructor_parameter_tool": {
                     "executed": True,
-                    "success": analysis.deployment_info is not None,
-                    "parameters_found": len(analysis.deployment_info.constructor_params) if analysis.deployment_info else 0
+                    "success": constructor_analysis["deployment_found"],
+                    "parameters_found": len(constructor_analysis["initialization_parameters"])
                 },
                 "state_reader_tool": {
                     "executed": True,
-                    "success": analysis.state_snapshot is not None,
-                    "functions_called": len(analysis.state_snapshot.state_data) if analysis.state_snapshot else 0
+                    "success": state_analysis["snapshot_captured"],
+                    "functions_called": state_analysis["successful_calls"]
                 },
                 "code_sanitizer_tool": {
                     "executed": True,
-                    "success": analysis.sanitized_code is not None,
-                    "code_optimized": analysis.sanitized_code.optimization_summary["size_reduction_percent"] if analysis.sanitized_code else 0
+                    "success": code_analysis["code_sanitized"],
+                    "code_optimized": code_analysis["size_reduction_percent"]
                 }
             },
             "overall_success": all([
@@ -337,12 +377,13 @@ class ContractDataExtractor:
                 "contract_verified": analysis.contract_info.verification_status if analysis.contract_info else False,
                 "source_code_available": bool(analysis.contract_info.source_code) if analysis.contract_info else False,
                 "abi_available": bool(analysis.contract_info.abi) if analysis.contract_info else False,
-                "deployment_traceable": analysis.deployment_info is not None
+                "deployment_traceable": constructor_analysis["deployment_found"]
             }
         }
     
     def _build_error_result(self, contract_address: str, error_message: str) -> Dict[str, Any]:
-        """构建错误结果"""
+        """构建错误结果（各部分共享同一个只读的错误对象）"""
+        error = {"error": error_message}
         return {
             "basic_info": {
                 "contract_address": contract_address,
@@ -351,15 +392,15 @@ class ContractDataExtractor:
                 "analysis_timestamp": int(time.time()),
                 "error": error_message
             },
-            "proxy_analysis": {"error": error_message},
-            "constructor_analysis": {"error": error_message},
-            "state_analysis": {"error": error_message},
-            "code_analysis": {"error": error_message},
-            "analysis_summary": {"error": error_message}
+            "proxy_analysis": error,
+            "constructor_analysis": error,
+            "state_analysis": error,
+            "code_analysis": error,
+            "analysis_summary": error
         }
 
-def save_results(data: Dict[str, Any], output_file: str = None) -> str:
-    """保存结果到JSON文件"""
+async def save_results(data: Dict[str, Any], output_file: str = None) -> str:
+    """保存结果到JSON文件（在工作线程中写入）"""
     if output_file is None:
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         contract_addr = data["basic_info"]["contract_address"]
@@ -371,65 +412,73 @@ def save_results(data: Dict[str, Any], output_file: str = None) -> str:
     output_path = Path("analysis_results") / output_file
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+    await write_json_async(output_path, data, sync=True)
     
     return str(output_path)
 
 def print_summary(data: Dict[str, Any]):
-    """打印分析摘要"""
+    """打印分析摘要（整段格式化后一次写出）"""
     basic = data["basic_info"]
     proxy = data["proxy_analysis"]
     constructor = data["constructor_analysis"]
     state = data["state_analysis"]
     code = data["code_analysis"]
     
-    print("\n" + "=" * 80)
-    print("📊 数据提取摘要")
-    print("=" * 80)
-    
-    print(f"🔗 合约: {basic['contract_address']}")
-    print(f"🌐 链: {basic['chain']}")
-    print(f"⏱️  分析时间: {basic.get('analysis_duration_seconds', 0)}秒")
-    
-    print(f"\n🔧 工具执行结果:")
-    print(f"   📋 代理检测: {'✅' if proxy.get('is_proxy') else '❌'} {proxy.get('proxy_type', 'N/A')}")
-    print(f"   🏗️  构造参数: {'✅' if constructor.get('deployment_found') else '❌'} {len(constructor.get('initialization_parameters', []))} 个参数")
-    print(f"   📸 状态快照: {'✅' if state.get('snapshot_captured') else '❌'} {state.get('successful_calls', 0)} 个调用成功")
-    print(f"   🧹 代码清理: {'✅' if code.get('code_sanitized') else '❌'} {code.get('size_reduction_percent', 0)}% 减少")
+    lines = [
+        "",
+        "=" * 80,
+        "📊 数据提取摘要",
+        "=" * 80,
+        f"🔗 合约: {basic['contract_address']}",
+        f"🌐 链: {basic['chain']}",
+        f"⏱️  分析时间: {basic.get('analysis_duration_seconds', 0)}秒",
+        "",
+        "🔧 工具执行结果:",
+        f"   📋 代理检测: {'✅' if proxy.get('is_proxy') else '❌'} {proxy.get('proxy_type', 'N/A')}",
+        f"   🏗️  构造参数: {'✅' if constructor.get('deployment_found') else '❌'} {len(constructor.get('initialization_parameters', []))} 个参数",
+        f"   📸 状态快照: {'✅' if state.get('snapshot_captured') else '❌'} {state.get('successful_calls', 0)} 个调用成功",
+        f"   🧹 代码清理: {'✅' if code.get('code_sanitized') else '❌'} {code.get('size_reduction_percent', 0)}% 减少",
+    ]
     
     if proxy.get('is_proxy'):
-        print(f"\n🔗 代理信息:")
-        print(f"   类型: {proxy.get('proxy_type')}")
-        print(f"   实现地址: {proxy.get('implementation_address')}")
-        print(f"   可执行逻辑访问: {'✅' if proxy.get('executable_logic_access') else '❌'}")
+        lines += [
+            "",
+            "🔗 代理信息:",
+            f"   类型: {proxy.get('proxy_type')}",
+            f"   实现地址: {proxy.get('implementation_address')}",
+            f"   可执行逻辑访问: {'✅' if proxy.get('executable_logic_access') else '❌'}",
+        ]
+    
+    lines.append("")
+    sys.stdout.write("\n".join(lines))
 
 async def main():
     """主函数"""
-    if len(sys.argv) != 3:
-        print("使用方法: python extract_contract_data.py <contract_address> <chain_name>")
+    args = [arg for arg in sys.argv[1:] if arg != "--raw"]
+    include_raw = len(args) != len(sys.argv) - 1
+    
+    if len(args) != 2:
+        print("使用方法: python extract_contract_data.py <contract_address> <chain_name> [--raw]")
         print(f"支持的链: {list(CHAIN_CONFIGS.keys())}")
         print("\n示例:")
         print("  python extract_contract_data.py 0xdDc0CFF76bcC0ee14c3e73aF630C029fe020F907 bsc")
         print("  python extract_contract_data.py 0xA0b86a33E6441E09e5fDE7f80b0138b43A5A9b27 eth")
         sys.exit(1)
     
-    contract_address = sys.argv[1]
-    chain_name = sys.argv[2]
+    contract_address, chain_name = args
     
     print("🚀 智能合约数据提取工具")
     print("基于A1四工具架构提取关键合约信息")
     print("=" * 80)
     
     try:
-        # 初始化提取器
-        extractor = ContractDataExtractor(chain_name)
-        
-        # 提取数据
-        extracted_data = await extractor.extract_all_data(contract_address)
+        # 初始化提取器（退出时释放分析器的网络连接和进程池）
+        async with ContractDataExtractor(chain_name, include_raw=include_raw) as extractor:
+            # 提取数据
+            extracted_data = await extractor.extract_all_data(contract_address)
         
         # 保存结果
-        output_file = save_results(extracted_data)
+        output_file = await save_results(extracted_data)
         
         # 打印摘要
         print_summary(extracted_data)
@@ -0,0 +1,100 @@
+"""
+HTTP工具模块
+创建keep-alive和连接池参数经过调整的HTTP会话，供各工具共享以复用TCP/TLS连接；
+以及各工具共享的请求限速器，使并发请求不超过Etherscan的频率限制
+"""
+
+import asyncio
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def create_requests_session(pool_connections: int = 32, pool_maxsize: int = 64,
+                            retries: int = 3, backoff_factor: float = 0.2) -> requests.Session:
+    """
+    创建同步HTTP会话（用于Web3 HTTPProvider和同步的Etherscan请求）
+
+    Args:
+        pool_connections: 缓存的连接池数量（按主机）
+        pool_maxsize: 每个连接池的最大连接数
+        retries: 连接错误和5xx/429响应的重试次数
+        backoff_factor: 重试退避基数（秒）
+
+    Returns:
+        requests会话
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None  # JSON-RPC使用POST，同样允许重试
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def create_aiohttp_session(limit: int = 64, limit_per_host: int = 32) -> aiohttp.ClientSession:
+    """
+    创建异步HTTP会话（需在事件循环中调用）
+
+    Args:
+        limit: 总连接数上限
+        limit_per_host: 单个主机的连接数上限
+
+    Returns:
+        aiohttp会话
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=300,
+        keepalive_timeout=60
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+class RateLimiter:
+    """
+    异步请求限速器（令牌桶）：平均每 interval 秒放行一个请求，空闲后最多连续放行 burst 个
+
+    可通过 ``await limiter.acquire()`` 或 ``async with limiter:`` 使用
+    """
+
+    def __init__(self, interval: float, burst: int = 1):
+        """
+        初始化限速器
+
+        Args:
+            interval: 平均请求间隔（秒），不大于0时不限速
+            burst: 空闲后允许连续发出的请求数
+        """
+        self.interval = interval
+        self.burst = max(1, burst)
+        # 理论上下一个请求的放行时间，只保存一个时间戳即可实现令牌桶
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        """等待到下一个可用的请求时间片"""
+        if self.interval <= 0:
+            return
+
+        # 先预留时间片再等待，并发调用者依次排在其后，无需加锁
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot - (self.burst - 1) * self.interval)
+        self._next_slot = max(now, self._next_slot) + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return None
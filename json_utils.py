@@ -0,0 +1,117 @@
+"""
+JSON工具模块
+解析接口响应和导出分析结果时优先使用orjson（C实现），不可用时回退到标准库json；
+两种路径都通过 _default 按字段展开dataclass，输出一致
+"""
+
+import asyncio
+import json
+import os
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+from typing import Any, Optional, Union
+
+# 可选依赖 - orjson
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# 超过该大小的输出按块写入文件，每块的大小
+_LARGE_OUTPUT_SIZE = 16 * 1024 * 1024
+_WRITE_CHUNK_SIZE = 64 * 1024
+
+# 解析JSON（接受str或bytes；orjson的解析错误同样是json.JSONDecodeError的子类）
+loads_json = orjson.loads if HAS_ORJSON else json.loads
+
+
+def _default(obj: Any) -> Any:
+    """
+    无法直接序列化的对象：dataclass只展开一层为字典（嵌套的dataclass由编码器再次调用本函数，
+    不像asdict那样深拷贝整棵对象树），其余转为字符串
+    """
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return {field.name: getattr(obj, field.name) for field in fields(obj)}
+    return str(obj)
+
+
+# 标准库回退路径使用的编码器，按块输出以免在内存中拼出完整的JSON字符串
+_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False, default=_default)
+
+
+def _orjson_dumps(data: Any) -> Optional[bytes]:
+    """使用orjson序列化，不可用或遇到超出64位的整数（如uint256）时返回None"""
+    if not HAS_ORJSON:
+        return None
+    try:
+        # dataclass交给 _default 按 fields() 展开：orjson原生序列化时会输出实例 __dict__ 中的全部属性，
+        # 包括 cached_property 缓存的值，与标准库回退路径的输出不一致
+        return orjson.dumps(data, default=_default,
+                            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS)
+    except TypeError:
+        return None
+
+
+def dumps_json(data: Any) -> bytes:
+    """
+    将数据序列化为缩进2格的UTF-8 JSON
+
+    Args:
+        data: 待序列化的数据（可包含dataclass）
+
+    Returns:
+        JSON字节串
+    """
+    payload = _orjson_dumps(data)
+    if payload is not None:
+        return payload
+
+    return _ENCODER.encode(data).encode('utf-8')
+
+
+def write_json(file_path: Union[str, Path], data: Any, sync: bool = False):
+    """
+    将数据写入JSON文件
+
+    Args:
+        file_path: 文件路径
+        data: 待序列化的数据（可包含dataclass）
+        sync: 写入完成后是否将文件数据刷到磁盘（只在末尾同步一次）
+    """
+    payload = _orjson_dumps(data)
+
+    if payload is None:
+        # 标准库回退：边编码边写入
+        with open(file_path, 'w', encoding='utf-8') as f:
+            for chunk in _ENCODER.iterencode(data):
+                f.write(chunk)
+
+            if sync:
+                f.flush()
+                getattr(os, 'fdatasync', os.fsync)(f.fileno())
+        return
+
+    with open(file_path, 'wb') as f:
+        if len(payload) <= _LARGE_OUTPUT_SIZE:
+            f.write(payload)
+        else:
+            view = memoryview(payload)
+            for offset in range(0, len(view), _WRITE_CHUNK_SIZE):
+                f.write(view[offset:offset + _WRITE_CHUNK_SIZE])
+
+        if sync:
+            f.flush()
+            getattr(os, 'fdatasync', os.fsync)(f.fileno())
+
+
+async def write_json_async(file_path: Union[str, Path], data: Any, sync: bool = False):
+    """
+    在工作线程中将数据写入JSON文件（序列化和磁盘写入不阻塞事件循环）
+
+    Args:
+        file_path: 文件路径
+        data: 待序列化的数据（可包含dataclass）
+        sync: 写入完成后是否将文件数据刷到磁盘
+    """
+    await asyncio.to_thread(write_json, file_path, data, sync)
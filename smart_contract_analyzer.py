@@ -6,21 +6,91 @@ Smart Contract Analyzer
 """
 
 import asyncio
-import json
+import os
 import time
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass
 from pathlib import Path
 
-from config import config, setup_logging, ensure_output_dir
+from config import Config, config, setup_logging, ensure_output_dir
+from json_utils import write_json
+from cache_utils import DiskCache
+from http_utils import create_requests_session, create_aiohttp_session, RateLimiter
 from tool_1_source_code_fetcher import SourceCodeFetcher, ContractInfo
 from tool_2_constructor_parameter import ConstructorParameterTool, DeploymentInfo
 from tool_3_state_reader import StateReaderTool, StateSnapshot
-from tool_4_code_sanitizer import CodeSanitizerTool, SanitizedCode
+from tool_4_code_sanitizer import CodeSanitizerTool, SanitizedCode, sanitize_source
 
 # 设置日志
 logger = setup_logging()
 
+# 分析报告各部分的模板（每行以换行结尾，部分之间以空行分隔）
+_REPORT_HEADER_TMPL = (
+    "=== 智能合约综合分析报告 ===\n"
+    "\n"
+    "合约地址: {address}\n"
+    "分析时间: {timestamp}\n"
+    "\n"
+    "=== 基本信息 ===\n"
+    "合约类型: {contract_type}\n"
+    "验证状态: {verification}\n"
+    "有源代码: {has_source}\n"
+    "有ABI: {has_abi}\n"
+)
+
+_PROXY_SECTION_TMPL = (
+    "=== 代理信息 ===\n"
+    "代理类型: {proxy_type}\n"
+    "实现地址: {implementation}\n"
+)
+
+_DEPLOYMENT_SECTION_TMPL = (
+    "=== 部署信息 ===\n"
+    "部署者: {deployer}\n"
+    "部署区块: {block}\n"
+    "Gas使用: {gas_used:,}\n"
+    "构造参数数量: {param_count}\n"
+)
+
+_STATE_SECTION_TMPL = (
+    "=== 状态快照 ===\n"
+    "快照区块: {block}\n"
+    "视图函数数量: {view_count}\n"
+    "成功调用: {success_count}\n"
+    "失败调用: {failed_count}\n"
+)
+
+_CODE_SECTION_TMPL = (
+    "=== 代码优化 ===\n"
+    "大小减少: {size_reduction:,} 字节 ({size_reduction_percent}%)\n"
+    "移除注释: {removed_comments} 个\n"
+    "移除函数: {removed_functions} 个\n"
+    "移除导入: {removed_imports} 个\n"
+    "移除变量: {removed_variables} 个\n"
+)
+
+
+@dataclass(slots=True)
+class AnalysisSummary:
+    """分析摘要（各步骤未执行或失败时，对应的统计字段为None）"""
+    contract_type: str
+    verification_status: bool
+    has_source_code: bool
+    has_abi: bool
+    constructor_analysis_success: bool
+    state_snapshot_success: bool
+    code_sanitization_success: bool
+    proxy_info: Optional[Dict[str, Any]] = None
+    constructor_params_count: Optional[int] = None
+    deployment_block: Optional[int] = None
+    deployer: Optional[str] = None
+    view_functions_count: Optional[int] = None
+    successful_calls: Optional[int] = None
+    failed_calls: Optional[int] = None
+    code_optimization: Optional[Dict[str, Any]] = None
+
 
 @dataclass
 class ComprehensiveAnalysis:
@@ -31,42 +101,88 @@ class ComprehensiveAnalysis:
     state_snapshot: Optional[StateSnapshot]
     sanitized_code: Optional[SanitizedCode]
     analysis_timestamp: int
-    analysis_summary: Dict[str, Any]
+    analysis_summary: AnalysisSummary
 
 
 class SmartContractAnalyzer:
     """智能合约综合分析器"""
     
-    def __init__(self, web3_provider: Optional[str] = None, etherscan_api_key: Optional[str] = None):
+    def __init__(self, web3_provider: Optional[str] = None, etherscan_api_key: Optional[str] = None,
+                 settings: Optional[Config] = None):
         """
         初始化智能合约分析器
         
         Args:
             web3_provider: Web3提供商URL（可选，将从配置文件读取）
             etherscan_api_key: Etherscan API密钥（可选，将从配置文件读取）
+            settings: 使用的配置实例（可选，默认为全局配置）
         """
+        self.config = settings or config
+        
         # 使用传入参数或配置文件中的值
-        self.web3_provider = web3_provider or config.web3_provider_url
-        self.etherscan_api_key = etherscan_api_key or config.etherscan_api_key
+        self.web3_provider = web3_provider or self.config.web3_provider_url
+        self.etherscan_api_key = etherscan_api_key or self.config.etherscan_api_key
         
         # 验证配置
         if not self.web3_provider:
             raise ValueError("Web3 Provider URL 未设置。请在.env文件中设置 WEB3_PROVIDER_URL 或通过参数传入。")
         
-        # 初始化工具
-        self.source_fetcher = SourceCodeFetcher(self.web3_provider, self.etherscan_api_key, config.etherscan_base_url)
-        self.constructor_tool = ConstructorParameterTool(self.web3_provider, self.etherscan_api_key, config.etherscan_base_url)
-        self.state_reader = StateReaderTool(self.web3_provider, self.etherscan_api_key, config.max_workers, config.etherscan_base_url)
-        self.code_sanitizer = CodeSanitizerTool()
+        # 各工具共享的HTTP会话（keep-alive + 连接池），避免重复的TCP/TLS握手；
+        # aiohttp会话需在事件循环中创建，不在事件循环中时由各工具首次请求时自行创建
+        self._http_session = create_requests_session()
+        try:
+            asyncio.get_running_loop()
+            self._session = create_aiohttp_session()
+        except RuntimeError:
+            self._session = None
         
         # 确保输出目录存在
         self.output_dir = ensure_output_dir()
         
+        # 已验证合约源代码和ABI的持久化缓存，重复运行时无需再次请求Etherscan
+        self._source_cache = DiskCache(self.output_dir / "source_cache.sqlite")
+        
+        # 三个工具并发访问Etherscan，共用一个限速器使请求间隔不小于 REQUEST_DELAY
+        self._rate_limiter = RateLimiter(self.config.request_delay)
+        
+        # 初始化工具
+        self.source_fetcher = SourceCodeFetcher(self.web3_provider, self.etherscan_api_key, self.config.etherscan_base_url,
+                                                http_session=self._http_session, session=self._session,
+                                                max_workers=self.config.max_workers, rate_limiter=self._rate_limiter,
+                                                disk_cache=self._source_cache)
+        self.constructor_tool = ConstructorParameterTool(self.web3_provider, self.etherscan_api_key, self.config.etherscan_base_url,
+                                                         session=self._session, http_session=self._http_session,
+                                                         rate_limiter=self._rate_limiter)
+        self.state_reader = StateReaderTool(self.web3_provider, self.etherscan_api_key, self.config.max_workers, self.config.etherscan_base_url,
+                                            session=self._session, rate_limiter=self._rate_limiter,
+                                            disk_cache=self._source_cache, call_cache_mode=self.config.call_cache_mode)
+        self.code_sanitizer = CodeSanitizerTool()
+        
+        # 代码清理是CPU密集型任务，放到进程池中多核并行且不阻塞事件循环（工作进程按需启动）
+        self._cpu_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        
         logger.info(f"智能合约分析器初始化完成")
         logger.info(f"Web3 Provider: {self.web3_provider[:50]}...")
         logger.info(f"Etherscan API: {'已设置' if self.etherscan_api_key else '未设置'}")
         logger.info(f"输出目录: {self.output_dir}")
     
+    async def aclose(self):
+        """释放共享的HTTP会话和各工具持有的网络连接"""
+        await self.source_fetcher.close()
+        await self.constructor_tool.close()
+        await self.state_reader.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._http_session.close()
+        self._source_cache.close()
+        self._cpu_pool.shutdown(wait=False)
+    
+    async def __aenter__(self) -> "SmartContractAnalyzer":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
     async def comprehensive_analysis(self, contract_address: str, block_number: Optional[int] = None, 
                                    include_sanitization: Optional[bool] = None) -> ComprehensiveAnalysis:
         """
@@ -83,9 +199,9 @@ class SmartContractAnalyzer:
         analysis_timestamp = int(time.time())
         
         # 使用配置中的默认值
-        if block_number is None and config.default_block != 'latest':
+        if block_number is None and self.config.default_block != 'latest':
             try:
-                block_number = int(config.default_block)
+                block_number = int(self.config.default_block)
             except ValueError:
                 block_number = None
         
@@ -94,39 +210,58 @@ class SmartContractAnalyzer:
         
         logger.info(f"开始分析合约: {contract_address}")
         
-        # 1. 获取合约信息和源代码
-        logger.info("1. 获取合约源代码和代理信息...")
-        contract_info = await self.source_fetcher.fetch_contract_info(contract_address, block_number)
-        
-        # 添加请求延迟
-        await asyncio.sleep(config.request_delay)
-        
-        # 2. 分析构造函数参数
-        logger.info("2. 分析构造函数参数...")
-        deployment_info = None
-        try:
-            deployment_info = await self.constructor_tool.analyze_constructor_params(contract_address)
-        except Exception as e:
-            logger.warning(f"构造函数参数分析失败: {e}")
-        
-        await asyncio.sleep(config.request_delay)
+        # 1-3. 合约信息、构造函数参数和状态快照互不依赖，并发获取
+        logger.info("1-3. 并发获取合约源代码、构造函数参数和状态快照...")
+        # 地址参数对应的合约名称只在生成报告或导出时需要，由 resolve_constructor_names 按需查询
+        constructor_task = asyncio.ensure_future(
+            self.constructor_tool.analyze_constructor_params(contract_address, resolve_names=False)
+        )
+        state_task = asyncio.ensure_future(self.state_reader.capture_state_snapshot(contract_address, block_number))
         
-        # 3. 捕获状态快照
-        logger.info("3. 捕获合约状态快照...")
-        state_snapshot = None
+        # 合约信息是后续步骤的基础，获取失败时取消其余步骤并直接抛出
         try:
-            state_snapshot = await self.state_reader.capture_state_snapshot(contract_address, block_number)
-        except Exception as e:
-            logger.warning(f"状态快照捕获失败: {e}")
-        
-        # 4. 代码清理（如果有源代码）
+            contract_info = await self.source_fetcher.fetch_contract_info(contract_address, block_number)
+        except BaseException:
+            constructor_task.cancel()
+            state_task.cancel()
+            await asyncio.gather(constructor_task, state_task, return_exceptions=True)
+            raise
+        
+        # 没有ABI时无法发现view函数，也无法解码构造参数（未验证合约和EOA均属此类），
+        # 取消对应步骤以节省RPC和Etherscan请求；跳过的决定单独记录，不依据任务的取消状态判断
+        skip_state = not contract_info.abi
+        skip_constructor = skip_state and not contract_info.constructor_args
+        if skip_state:
+            state_task.cancel()
+        if skip_constructor:
+            constructor_task.cancel()
+        
+        deployment_info, state_snapshot = await asyncio.gather(constructor_task, state_task, return_exceptions=True)
+        
+        if skip_constructor:
+            logger.info("无ABI和构造参数，跳过构造函数参数分析")
+            deployment_info = None
+        elif isinstance(deployment_info, BaseException):
+            logger.warning(f"构造函数参数分析失败: {deployment_info}")
+            deployment_info = None
+        
+        if skip_state:
+            logger.info("无ABI，跳过状态快照")
+            state_snapshot = None
+        elif isinstance(state_snapshot, BaseException):
+            logger.warning(f"状态快照捕获失败: {state_snapshot}")
+            state_snapshot = None
+        
+        # 4. 代码清理（如果有源代码），在进程池中执行以免阻塞事件循环
         logger.info("4. 执行代码清理...")
         sanitized_code = None
         if include_sanitization and contract_info.source_code:
             try:
-                sanitized_code = self.code_sanitizer.sanitize_solidity_code(
-                    contract_info.source_code, 
-                    config.keep_essential_comments
+                sanitized_code = await asyncio.get_running_loop().run_in_executor(
+                    self._cpu_pool,
+                    sanitize_source,
+                    contract_info.source_code,
+                    self.config.keep_essential_comments
                 )
             except Exception as e:
                 logger.warning(f"代码清理失败: {e}")
@@ -151,7 +286,7 @@ class SmartContractAnalyzer:
     def _generate_analysis_summary(self, contract_info: ContractInfo, 
                                  deployment_info: Optional[DeploymentInfo],
                                  state_snapshot: Optional[StateSnapshot],
-                                 sanitized_code: Optional[SanitizedCode]) -> Dict[str, Any]:
+                                 sanitized_code: Optional[SanitizedCode]) -> AnalysisSummary:
         """
         生成分析摘要
         
@@ -164,19 +299,19 @@ class SmartContractAnalyzer:
         Returns:
             分析摘要
         """
-        summary = {
-            "contract_type": "proxy" if contract_info.proxy_info else "implementation",
-            "verification_status": contract_info.verification_status,
-            "has_source_code": bool(contract_info.source_code),
-            "has_abi": bool(contract_info.abi),
-            "constructor_analysis_success": deployment_info is not None,
-            "state_snapshot_success": state_snapshot is not None,
-            "code_sanitization_success": sanitized_code is not None
-        }
+        summary = AnalysisSummary(
+            contract_type="proxy" if contract_info.proxy_info else "implementation",
+            verification_status=contract_info.verification_status,
+            has_source_code=bool(contract_info.source_code),
+            has_abi=bool(contract_info.abi),
+            constructor_analysis_success=deployment_info is not None,
+            state_snapshot_success=state_snapshot is not None,
+            code_sanitization_success=sanitized_code is not None
+        )
         
         # 代理信息摘要
         if contract_info.proxy_info:
-            summary["proxy_info"] = {
+            summary.proxy_info = {
                 "type": contract_info.proxy_info.proxy_type,
                 "implementation_address": contract_info.proxy_info.implementation_address,
                 "has_admin": bool(contract_info.proxy_info.admin_address)
@@ -184,49 +319,95 @@ class SmartContractAnalyzer:
         
         # 构造函数参数摘要
         if deployment_info:
-            summary["constructor_params_count"] = len(deployment_info.constructor_params)
-            summary["deployment_block"] = deployment_info.block_number
-            summary["deployer"] = deployment_info.deployer_address
+            summary.constructor_params_count = len(deployment_info.constructor_params)
+            summary.deployment_block = deployment_info.block_number
+            summary.deployer = deployment_info.deployer_address
         
         # 状态快照摘要
         if state_snapshot:
-            summary["view_functions_count"] = len(state_snapshot.view_functions)
-            summary["successful_calls"] = len(state_snapshot.state_data)
-            summary["failed_calls"] = len(state_snapshot.failed_calls)
+            summary.view_functions_count = len(state_snapshot.view_functions)
+            summary.successful_calls = len(state_snapshot.state_data)
+            summary.failed_calls = len(state_snapshot.failed_calls)
         
         # 代码清理摘要
         if sanitized_code:
-            summary["code_optimization"] = sanitized_code.optimization_summary
+            summary.code_optimization = sanitized_code.optimization_summary
         
         return summary
     
     async def batch_analyze_contracts(self, contract_addresses: List[str], 
-                                    block_number: Optional[int] = None) -> Dict[str, ComprehensiveAnalysis]:
+                                    block_number: Optional[int] = None,
+                                    max_concurrency: Optional[int] = None) -> Dict[str, ComprehensiveAnalysis]:
         """
         批量分析多个合约
         
         Args:
             contract_addresses: 合约地址列表
             block_number: 目标区块号
+            max_concurrency: 同时进行分析的合约数上限（默认为 min(MAX_WORKERS, 8)）
             
         Returns:
-            地址到分析结果的映射
+            地址到分析结果的映射（按输入顺序，分析失败的合约不包含在内）
         """
-        tasks = []
-        for address in contract_addresses:
-            task = self.comprehensive_analysis(address, block_number)
-            tasks.append(task)
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = {
+            address: analysis
+            async for address, analysis in self.iter_analyze_contracts(contract_addresses, block_number, max_concurrency)
+        }
+        return {address: results[address] for address in contract_addresses if address in results}
+    
+    async def iter_analyze_contracts(self, contract_addresses: List[str],
+                                     block_number: Optional[int] = None,
+                                     max_concurrency: Optional[int] = None) -> AsyncIterator[Tuple[str, ComprehensiveAnalysis]]:
+        """
+        批量分析多个合约，按完成顺序逐个产出结果
         
-        analysis_map = {}
-        for i, result in enumerate(results):
-            if isinstance(result, ComprehensiveAnalysis):
-                analysis_map[contract_addresses[i]] = result
-            else:
-                print(f"分析合约 {contract_addresses[i]} 失败: {result}")
+        固定数量的工作协程依次领取地址，同时存在的分析任务和未被消费的结果都不超过并发上限，
+        避免一次性为所有地址创建任务而超出节点和Etherscan的速率限制
         
-        return analysis_map
+        Args:
+            contract_addresses: 合约地址列表
+            block_number: 目标区块号
+            max_concurrency: 同时进行分析的合约数上限（默认为 min(MAX_WORKERS, 8)）
+            
+        Yields:
+            (合约地址, 分析结果)，分析失败的合约记录警告后跳过
+        """
+        if not contract_addresses:
+            return
+        
+        concurrency = max(1, min(max_concurrency or min(self.config.max_workers, 8), len(contract_addresses)))
+        pending = iter(contract_addresses)
+        results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        
+        async def worker():
+            for address in pending:
+                try:
+                    result = await self.comprehensive_analysis(address, block_number)
+                except Exception as e:
+                    result = e
+                await results.put((address, result))
+            # 每个工作协程结束时放入一个结束标记
+            await results.put(None)
+        
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            finished = 0
+            while finished < concurrency:
+                item = await results.get()
+                if item is None:
+                    finished += 1
+                    continue
+                
+                address, result = item
+                if isinstance(result, Exception):
+                    logger.warning(f"分析合约 {address} 失败: {result}")
+                    continue
+                yield address, result
+        finally:
+            # 调用方提前停止迭代时取消剩余的分析
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
     
     def export_analysis_to_json(self, analysis: ComprehensiveAnalysis, file_path: Optional[str] = None):
         """
@@ -244,11 +425,8 @@ class SmartContractAnalyzer:
         # 确保目录存在
         Path(file_path).parent.mkdir(parents=True, exist_ok=True)
         
-        # 转换为可序列化的字典
-        data = asdict(analysis)
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+        # 直接序列化dataclass，无需先用asdict深拷贝为字典
+        write_json(file_path, analysis)
         
         logger.info(f"分析结果已导出到: {file_path}")
         return file_path
@@ -263,73 +441,84 @@ class SmartContractAnalyzer:
         Returns:
             格式化的分析报告
         """
-        lines = []
-        lines.append("=== 智能合约综合分析报告 ===")
-        lines.append("")
-        lines.append(f"合约地址: {analysis.contract_address}")
-        lines.append(f"分析时间: {analysis.analysis_timestamp}")
-        lines.append("")
-        
-        # 基本信息
-        lines.append("=== 基本信息 ===")
-        lines.append(f"合约类型: {analysis.analysis_summary['contract_type']}")
-        lines.append(f"验证状态: {'已验证' if analysis.analysis_summary['verification_status'] else '未验证'}")
-        lines.append(f"有源代码: {'是' if analysis.analysis_summary['has_source_code'] else '否'}")
-        lines.append(f"有ABI: {'是' if analysis.analysis_summary['has_abi'] else '否'}")
-        lines.append("")
-        
-        # 代理信息
-        if analysis.contract_info.proxy_info:
-            lines.append("=== 代理信息 ===")
-            lines.append(f"代理类型: {analysis.contract_info.proxy_info.proxy_type}")
-            lines.append(f"实现地址: {analysis.contract_info.proxy_info.implementation_address}")
-            if analysis.contract_info.proxy_info.admin_address:
-                lines.append(f"管理员地址: {analysis.contract_info.proxy_info.admin_address}")
-            lines.append("")
-        
-        # 部署信息
-        if analysis.deployment_info:
-            lines.append("=== 部署信息 ===")
-            lines.append(f"部署者: {analysis.deployment_info.deployer_address}")
-            lines.append(f"部署区块: {analysis.deployment_info.block_number}")
-            lines.append(f"Gas使用: {analysis.deployment_info.gas_used:,}")
-            lines.append(f"构造参数数量: {len(analysis.deployment_info.constructor_params)}")
-            
-            if analysis.deployment_info.constructor_params:
-                lines.append("构造参数:")
-                for param in analysis.deployment_info.constructor_params:
-                    value_str = param.decoded_value if param.decoded_value else str(param.value)
-                    lines.append(f"  {param.name} ({param.type}): {value_str}")
-            lines.append("")
-        
-        # 状态信息
-        if analysis.state_snapshot:
-            lines.append("=== 状态快照 ===")
-            lines.append(f"快照区块: {analysis.state_snapshot.block_number}")
-            lines.append(f"视图函数数量: {len(analysis.state_snapshot.view_functions)}")
-            lines.append(f"成功调用: {len(analysis.state_snapshot.state_data)}")
-            lines.append(f"失败调用: {len(analysis.state_snapshot.failed_calls)}")
+        summary = analysis.analysis_summary
+        header = _REPORT_HEADER_TMPL.format(
+            address=analysis.contract_address,
+            timestamp=analysis.analysis_timestamp,
+            contract_type=summary.contract_type,
+            verification='已验证' if summary.verification_status else '未验证',
+            has_source='是' if summary.has_source_code else '否',
+            has_abi='是' if summary.has_abi else '否'
+        )
+        
+        # 各部分均为以换行结尾的完整段落，缺失的部分被过滤掉
+        sections = [
+            header,
+            self._format_proxy_section(analysis.contract_info.proxy_info) if analysis.contract_info.proxy_info else None,
+            self._format_deployment_section(analysis.deployment_info) if analysis.deployment_info else None,
+            self._format_state_section(analysis.state_snapshot) if analysis.state_snapshot else None,
+            self._format_code_section(analysis.sanitized_code) if analysis.sanitized_code else None
+        ]
+        
+        return "\n".join(filter(None, sections))
+    
+    def _format_proxy_section(self, proxy_info) -> str:
+        """格式化报告的代理信息部分"""
+        section = _PROXY_SECTION_TMPL.format(
+            proxy_type=proxy_info.proxy_type,
+            implementation=proxy_info.implementation_address
+        )
+        if proxy_info.admin_address:
+            section += f"管理员地址: {proxy_info.admin_address}\n"
+        return section
+    
+    def _format_deployment_section(self, deployment_info: DeploymentInfo) -> str:
+        """格式化报告的部署信息部分"""
+        section = _DEPLOYMENT_SECTION_TMPL.format(
+            deployer=deployment_info.deployer_address,
+            block=deployment_info.block_number,
+            gas_used=deployment_info.gas_used,
+            param_count=len(deployment_info.constructor_params)
+        )
+        if deployment_info.constructor_params:
+            section += "构造参数:\n" + "".join(
+                f"  {param.name} ({param.type}): {param.decoded_value if param.decoded_value else str(param.value)}\n"
+                for param in deployment_info.constructor_params
+            )
+        return section
+    
+    def _format_state_section(self, state_snapshot: StateSnapshot) -> str:
+        """格式化报告的状态快照部分"""
+        section = _STATE_SECTION_TMPL.format(
+            block=state_snapshot.block_number,
+            view_count=len(state_snapshot.view_functions),
+            success_count=len(state_snapshot.state_data),
+            failed_count=len(state_snapshot.failed_calls)
+        )
+        if state_snapshot.state_data:
+            section += "状态数据 (前5个):\n" + "".join(
+                f"  {key}: {value}\n"
+                for key, value in islice(state_snapshot.state_data.items(), 5)
+            )
+        return section
+    
+    def _format_code_section(self, sanitized_code: SanitizedCode) -> str:
+        """格式化报告的代码优化部分"""
+        return _CODE_SECTION_TMPL.format(**sanitized_code.optimization_summary)
+    
+    async def resolve_constructor_names(self, analysis: ComprehensiveAnalysis) -> ComprehensiveAnalysis:
+        """
+        为构造函数的地址参数查询合约名称（生成报告或导出前调用，结果补充到参数的可读值中）
+        
+        Args:
+            analysis: 分析结果
             
-            if analysis.state_snapshot.state_data:
-                lines.append("状态数据 (前5个):")
-                for i, (key, value) in enumerate(analysis.state_snapshot.state_data.items()):
-                    if i >= 5:
-                        break
-                    lines.append(f"  {key}: {value}")
-            lines.append("")
-        
-        # 代码优化信息
-        if analysis.sanitized_code:
-            lines.append("=== 代码优化 ===")
-            opt = analysis.sanitized_code.optimization_summary
-            lines.append(f"大小减少: {opt['size_reduction']:,} 字节 ({opt['size_reduction_percent']}%)")
-            lines.append(f"移除注释: {opt['removed_comments']} 个")
-            lines.append(f"移除函数: {opt['removed_functions']} 个")
-            lines.append(f"移除导入: {opt['removed_imports']} 个")
-            lines.append(f"移除变量: {opt['removed_variables']} 个")
-            lines.append("")
-        
-        return "\n".join(lines)
+        Returns:
+            原分析结果（原地更新）
+        """
+        if analysis.deployment_info and analysis.deployment_info.constructor_params:
+            await self.constructor_tool.resolve_contract_names(analysis.deployment_info.constructor_params)
+        return analysis
     
     async def compare_contract_states(self, contract_address: str, 
                                     block1: int, block2: int) -> Dict[str, Any]:
@@ -344,9 +533,11 @@ class SmartContractAnalyzer:
         Returns:
             状态比较结果
         """
-        # 获取两个区块的状态快照
-        snapshot1 = await self.state_reader.capture_state_snapshot(contract_address, block1)
-        snapshot2 = await self.state_reader.capture_state_snapshot(contract_address, block2)
+        # 并发获取两个区块的状态快照
+        snapshot1, snapshot2 = await asyncio.gather(
+            self.state_reader.capture_state_snapshot(contract_address, block1),
+            self.state_reader.capture_state_snapshot(contract_address, block2)
+        )
         
         # 比较状态
         comparison = await self.state_reader.compare_state_snapshots(snapshot1, snapshot2)
@@ -370,43 +561,43 @@ async def main():
         return
     
     try:
-        # 初始化分析器（使用.env文件中的配置）
-        analyzer = SmartContractAnalyzer()
-        
-        # 单个合约分析
-        contract_address = "0xA0b86a33E6441E09e5fDE7f80b0138b43A5A9b27"
-        
-        print("🚀 执行全面分析...")
-        analysis = await analyzer.comprehensive_analysis(contract_address)
-        
-        # 生成报告
-        report = analyzer.generate_analysis_report(analysis)
-        print(report)
-        
-        # 导出结果（自动生成文件名）
-        exported_file = analyzer.export_analysis_to_json(analysis)
-        print(f"✅ 结果已导出到: {exported_file}")
-        
-        # 批量分析示例
-        print("\n🔄 执行批量分析...")
-        contracts = [
-            "0xA0b86a33E6441E09e5fDE7f80b0138b43A5A9b27",
-            "0x1f9840a85d5aF5bf1D1762F925BDADdC4201F984"
-        ]
-        
-        batch_results = await analyzer.batch_analyze_contracts(contracts)
-        print(f"✅ 批量分析完成，成功分析 {len(batch_results)} 个合约")
-        
-        # 状态比较示例
-        print("\n📊 执行状态比较...")
-        comparison = await analyzer.compare_contract_states(
-            contract_address, 
-            18500000,  # 较早的区块
-            18600000   # 较晚的区块
-        )
-        
-        print(f"✅ 状态变化数量: {len(comparison['changes'])}")
-        
+        # 初始化分析器（使用.env文件中的配置），退出时释放共享的HTTP连接池
+        async with SmartContractAnalyzer() as analyzer:
+            # 单个合约分析
+            contract_address = "0xA0b86a33E6441E09e5fDE7f80b0138b43A5A9b27"
+            
+            print("🚀 执行全面分析...")
+            analysis = await analyzer.comprehensive_analysis(contract_address)
+            await analyzer.resolve_constructor_names(analysis)
+            
+            # 生成报告
+            report = analyzer.generate_analysis_report(analysis)
+            print(report)
+            
+            # 导出结果（自动生成文件名）
+            exported_file = analyzer.export_analysis_to_json(analysis)
+            print(f"✅ 结果已导出到: {exported_file}")
+            
+            # 批量分析示例
+            print("\n🔄 执行批量分析...")
+            contracts = [
+                "0xA0b86a33E6441E09e5fDE7f80b0138b43A5A9b27",
+                "0x1f9840a85d5aF5bf1D1762F925BDADdC4201F984"
+            ]
+            
+            batch_results = await analyzer.batch_analyze_contracts(contracts)
+            print(f"✅ 批量分析完成，成功分析 {len(batch_results)} 个合约")
+            
+            # 状态比较示例
+            print("\n📊 执行状态比较...")
+            comparison = await analyzer.compare_contract_states(
+                contract_address, 
+                18500000,  # 较早的区块
+                18600000   # 较晚的区块
+            )
+            
+            print(f"✅ 状态变化数量: {len(comparison['changes'])}")
+            
     except ValueError as e:
         print(f"❌ 配置错误: {e}")
         print("💡 请检查.env文件或参考env_example.txt")
@@ -0,0 +1,47 @@
+"""
+json_utils 测试：orjson与标准库回退路径的输出必须一致
+"""
+
+import unittest
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import List
+
+import json_utils
+
+
+@dataclass
+class _Item:
+    name: str
+    value: int
+
+
+@dataclass
+class _Report:
+    title: str
+    items: List[_Item] = field(default_factory=list)
+
+    @cached_property
+    def item_count(self) -> int:
+        return len(self.items)
+
+
+class DumpsJsonTest(unittest.TestCase):
+
+    @unittest.skipUnless(json_utils.HAS_ORJSON, "需要orjson")
+    def test_orjson_and_stdlib_outputs_match(self):
+        report = _Report(title="状态快照", items=[_Item("totalSupply", 1000), _Item("owner", 0)])
+        # 访问cached_property后缓存值写入实例 __dict__，不应出现在导出结果中
+        self.assertEqual(report.item_count, 2)
+
+        data = {"report": report, 1: [1.5, None, True]}
+
+        orjson_output = json_utils.dumps_json(data)
+        stdlib_output = json_utils._ENCODER.encode(data).encode('utf-8')
+
+        self.assertEqual(orjson_output, stdlib_output)
+        self.assertNotIn(b"item_count", orjson_output)
+
+
+if __name__ == '__main__':
+    unittest.main()
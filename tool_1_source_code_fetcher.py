@@ -8,13 +8,55 @@ Source Code Fetcher Tool
 """
 
 import json
+import re
 import asyncio
+import hashlib
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 from web3 import Web3
-from eth_utils import to_checksum_address, is_address
+from eth_utils import to_checksum_address, decode_hex
+import aiohttp
 import requests
 
+from cache_utils import TTLCache, SingleFlight, DiskCache
+from http_utils import RateLimiter, create_aiohttp_session
+from json_utils import loads_json
+
+
+# Etherscan源代码查询结果缓存，键为 (Etherscan API地址, 小写合约地址)，跨工具实例共享；
+# 已验证合约的源代码和ABI不会改变，未验证的合约之后可能被验证，因此缓存时间较短
+_ETHERSCAN_DATA_CACHE = TTLCache(maxsize=4096, ttl=86400)
+_UNVERIFIED_TTL = 600
+_ETHERSCAN_DATA_FLIGHT = SingleFlight()
+
+# 代理检测结果缓存，键为 (节点地址, 小写合约地址, 区块号)；历史区块的结果不会改变，
+# 最新区块的实现地址可能因升级而改变，因此缓存时间较短
+_PROXY_INFO_CACHE = TTLCache(maxsize=4096, ttl=86400)
+_LATEST_PROXY_TTL = 60
+_PROXY_INFO_FLIGHT = SingleFlight()
+_NOT_CACHED = object()
+
+# 未验证合约的getsourcecode响应中的ABI字段，命中时无需解析响应
+_UNVERIFIED_MARKER = b'"ABI":"Contract source code not verified"'
+_UNVERIFIED_DATA = (None, None, None, False, None)
+
+# EIP-1167最小代理的运行时字节码：固定前缀 + 20字节实现地址 + 固定后缀，一次扫描即可匹配并取出地址
+_EIP1167_RE = re.compile(r"363d3d373d3d3d363d73([0-9a-fA-F]{40})5af43d82803e903d91602b57fd5bf3")
+
+# 字节码模式识别结果缓存，键为字节码摘要，值为识别出的实现地址（非代理为None）；
+# 字节码部署后不可变，且最小代理的实现地址编码在字节码中，相同字节码的结果必然相同
+_BYTECODE_PATTERN_CACHE = TTLCache(maxsize=4096, ttl=86400)
+
+
+# 校验和地址需要计算keccak256；代理、实现、管理员地址在批量查询中反复出现，缓存转换结果
+_to_checksum_address = lru_cache(maxsize=4096)(to_checksum_address)
+
+
+def _block_param(block_number: Optional[int]) -> str:
+    """JSON-RPC的区块参数（未指定区块时为latest）"""
+    return hex(block_number) if block_number else 'latest'
+
 
 @dataclass
 class ProxyInfo:
@@ -52,7 +94,32 @@ class SourceCodeFetcher:
     # OpenZeppelin代理模式
     OPENZEPPELIN_IMPLEMENTATION_SLOT = "0x7050c9e0f4ca769c69bd3a8ef740bc37934f8e2c036e5a723fd8ee048ed3f8c3"
     
-    def __init__(self, web3_provider: str, etherscan_api_key: Optional[str] = None, etherscan_base_url: Optional[str] = None):
+    # 空存储槽（存储槽数据以原始字节处理，无需十六进制编码）
+    ZERO_WORD = b"\x00" * 32
+    # 地址存放在存储槽的低20字节，高12字节必须为0
+    _ZERO_ADDRESS_PADDING = b"\x00" * 12
+    _ZERO_ADDRESS = b"\x00" * 20
+    
+    # 按检测优先级排列的实现槽：(代理类型, 实现槽, 是否读取管理员和信标槽)
+    _PROXY_SLOTS = (
+        ("EIP-1967", EIP1967_IMPLEMENTATION_SLOT, True),
+        ("EIP-1822", EIP1822_LOGIC_SLOT, False),
+        ("OpenZeppelin", OPENZEPPELIN_IMPLEMENTATION_SLOT, False)
+    )
+    
+    # 代理检测需要批量读取的全部存储槽
+    _PROXY_READ_SLOTS = (
+        EIP1967_IMPLEMENTATION_SLOT,
+        EIP1967_ADMIN_SLOT,
+        EIP1967_BEACON_SLOT,
+        EIP1822_LOGIC_SLOT,
+        OPENZEPPELIN_IMPLEMENTATION_SLOT
+    )
+    
+    def __init__(self, web3_provider: str, etherscan_api_key: Optional[str] = None, etherscan_base_url: Optional[str] = None,
+                 http_session: Optional[requests.Session] = None, session: Optional[aiohttp.ClientSession] = None,
+                 max_workers: int = 10, rate_limiter: Optional[RateLimiter] = None,
+                 disk_cache: Optional[DiskCache] = None):
         """
         初始化源代码获取工具
         
@@ -60,10 +127,35 @@ class SourceCodeFetcher:
             web3_provider: Web3提供商URL
             etherscan_api_key: Etherscan API密钥（用于获取源代码）
             etherscan_base_url: Etherscan API基础URL（支持BSCScan等）
+            http_session: 共享的requests会话（用于Web3 HTTPProvider）
+            session: 共享的aiohttp会话（用于Etherscan请求，为空时在首次请求时自行创建）
+            max_workers: 批量获取时的最大并发请求数
+            rate_limiter: 共享的Etherscan请求限速器（为空时不限速）
+            disk_cache: 已验证合约源代码的持久化缓存（为空时只使用内存缓存）
         """
-        self.w3 = Web3(Web3.HTTPProvider(web3_provider))
+        self.web3_provider = web3_provider
+        self.w3 = Web3(Web3.HTTPProvider(web3_provider, session=http_session))
         self.etherscan_api_key = etherscan_api_key
         self.etherscan_base_url = etherscan_base_url or "https://api.etherscan.io/api"
+        self.max_workers = max_workers
+        self._rate_limiter = rate_limiter or RateLimiter(0)
+        self._disk_cache = disk_cache
+        
+        self._session = session
+        self._owns_session = session is None
+    
+    async def _http(self) -> aiohttp.ClientSession:
+        """获取HTTP会话（需在事件循环中创建，因此延迟到首次请求）"""
+        if self._session is None or self._session.closed:
+            self._session = create_aiohttp_session(limit=20, limit_per_host=10)
+            self._owns_session = True
+        return self._session
+    
+    async def close(self):
+        """关闭自行创建的HTTP会话"""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def fetch_contract_info(self, address: str, block_number: Optional[int] = None) -> ContractInfo:
         """
@@ -76,7 +168,7 @@ class SourceCodeFetcher:
         Returns:
             合约信息对象
         """
-        address = to_checksum_address(address)
+        address = _to_checksum_address(address)
         
         # 检查是否为代理合约
         proxy_info = await self._detect_proxy_pattern(address, block_number)
@@ -108,61 +200,168 @@ class SourceCodeFetcher:
         Returns:
             代理信息（如果是代理合约）
         """
-        # 检查EIP-1967标准代理
-        eip1967_impl = await self._read_storage_slot(address, self.EIP1967_IMPLEMENTATION_SLOT, block_number)
-        if eip1967_impl and eip1967_impl != "0x0000000000000000000000000000000000000000000000000000000000000000":
-            implementation_address = "0x" + eip1967_impl[-40:]
-            if is_address(implementation_address):
-                admin_address = await self._read_storage_slot(address, self.EIP1967_ADMIN_SLOT, block_number)
-                beacon_address = await self._read_storage_slot(address, self.EIP1967_BEACON_SLOT, block_number)
-                
-                return ProxyInfo(
-                    proxy_address=address,
-                    implementation_address=to_checksum_address(implementation_address),
-                    proxy_type="EIP-1967",
-                    admin_address=to_checksum_address("0x" + admin_address[-40:]) if admin_address and admin_address != "0x0000000000000000000000000000000000000000000000000000000000000000" else None,
-                    beacon_address=to_checksum_address("0x" + beacon_address[-40:]) if beacon_address and beacon_address != "0x0000000000000000000000000000000000000000000000000000000000000000" else None
-                )
+        cache_key = (self.web3_provider, address.lower(), block_number)
+        cached = _PROXY_INFO_CACHE.get(cache_key, _NOT_CACHED)
+        if cached is not _NOT_CACHED:
+            return cached
         
-        # 检查EIP-1822标准代理
-        eip1822_impl = await self._read_storage_slot(address, self.EIP1822_LOGIC_SLOT, block_number)
-        if eip1822_impl and eip1822_impl != "0x0000000000000000000000000000000000000000000000000000000000000000":
-            implementation_address = "0x" + eip1822_impl[-40:]
-            if is_address(implementation_address):
-                return ProxyInfo(
-                    proxy_address=address,
-                    implementation_address=to_checksum_address(implementation_address),
-                    proxy_type="EIP-1822"
-                )
+        # 多个代理指向同一地址时的并发检测只执行一次
+        return await _PROXY_INFO_FLIGHT.run(cache_key, lambda: self._request_proxy_pattern(address, block_number, cache_key))
+    
+    async def _request_proxy_pattern(self, address: str, block_number: Optional[int], cache_key: Tuple) -> Optional[ProxyInfo]:
+        """
+        读取代理相关存储槽和字节码并识别代理模式，结果写入缓存
         
-        # 检查OpenZeppelin代理模式
-        oz_impl = await self._read_storage_slot(address, self.OPENZEPPELIN_IMPLEMENTATION_SLOT, block_number)
-        if oz_impl and oz_impl != "0x0000000000000000000000000000000000000000000000000000000000000000":
-            implementation_address = "0x" + oz_impl[-40:]
-            if is_address(implementation_address):
+        Args:
+            address: 合约地址
+            block_number: 目标区块号
+            cache_key: 缓存键
+            
+        Returns:
+            代理信息（如果是代理合约）
+        """
+        proxy_info = await self._match_proxy_pattern(address, block_number)
+        _PROXY_INFO_CACHE.set(cache_key, proxy_info, ttl=None if block_number else _LATEST_PROXY_TTL)
+        return proxy_info
+    
+    async def _match_proxy_pattern(self, address: str, block_number: Optional[int] = None) -> Optional[ProxyInfo]:
+        """按EIP-1967、EIP-1822、OpenZeppelin和字节码模式的顺序识别代理"""
+        # 代理检测所需的存储槽和字节码通过一次JSON-RPC批量请求读取
+        slots, bytecode = await self._read_proxy_state(address, block_number)
+        
+        # 按优先级检查各标准代理的实现槽，取第一个非空的有效地址
+        for proxy_type, slot, reads_admin_beacon in self._PROXY_SLOTS:
+            implementation_address = self._slot_to_address(slots[slot])
+            if not implementation_address:
+                continue
+            
+            if reads_admin_beacon:
                 return ProxyInfo(
                     proxy_address=address,
-                    implementation_address=to_checksum_address(implementation_address),
-                    proxy_type="OpenZeppelin"
+                    implementation_address=implementation_address,
+                    proxy_type=proxy_type,
+                    admin_address=self._slot_to_address(slots[self.EIP1967_ADMIN_SLOT]),
+                    beacon_address=self._slot_to_address(slots[self.EIP1967_BEACON_SLOT])
                 )
+            
+            return ProxyInfo(
+                proxy_address=address,
+                implementation_address=implementation_address,
+                proxy_type=proxy_type
+            )
         
         # 通过字节码模式检测
-        bytecode = self.w3.eth.get_code(address, block_identifier=block_number or 'latest')
-        proxy_info = await self._analyze_bytecode_patterns(address, bytecode.hex())
+        proxy_info = await self._analyze_bytecode_patterns(address, bytecode)
         
         return proxy_info
     
-    async def _read_storage_slot(self, address: str, slot: str, block_number: Optional[int] = None) -> str:
-        """读取存储槽数据"""
+    @classmethod
+    def _slot_to_address(cls, value: bytes) -> Optional[str]:
+        """从存储槽数据的低20字节中提取地址（槽为空或高12字节不为0时返回None）"""
+        value = value.rjust(32, b"\x00")
+        if value[:12] != cls._ZERO_ADDRESS_PADDING or value[12:] == cls._ZERO_ADDRESS:
+            return None
+        
+        return _to_checksum_address(value[12:])
+    
+    async def _read_proxy_state(self, address: str, block_number: Optional[int] = None) -> Tuple[Dict[str, bytes], str]:
+        """
+        批量读取代理检测所需的存储槽和合约字节码
+        
+        Args:
+            address: 合约地址
+            block_number: 目标区块号
+            
+        Returns:
+            (存储槽到数据的映射, 字节码)
+        """
+        slots = self._PROXY_READ_SLOTS
+        block = _block_param(block_number)
+        
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": "eth_getStorageAt", "params": [address, slot, block]}
+            for i, slot in enumerate(slots)
+        ]
+        payload.append({"jsonrpc": "2.0", "id": len(slots), "method": "eth_getCode", "params": [address, block]})
+        
+        body = None
         try:
-            result = self.w3.eth.get_storage_at(
-                address, 
-                slot, 
-                block_identifier=block_number or 'latest'
-            )
-            return result.hex()
-        except Exception:
-            return "0x0000000000000000000000000000000000000000000000000000000000000000"
+            session = await self._http()
+            async with session.post(self.web3_provider, json=payload,
+                                    timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status != 429:
+                    body = loads_json(await response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            pass
+        
+        results: Dict[int, str] = {}
+        # 不支持批量请求或限流的节点返回单个错误对象
+        if isinstance(body, list):
+            for item in body:
+                if isinstance(item, dict) and isinstance(item.get("result"), str):
+                    results[item.get("id")] = item["result"]
+        
+        if len(results) == len(payload):
+            try:
+                return {slot: decode_hex(results[i]) for i, slot in enumerate(slots)}, results[len(slots)]
+            except ValueError:
+                pass
+        
+        # 批量请求失败时回退为并行的单个请求
+        values = await asyncio.gather(
+            *(self._read_storage_slot(address, slot, block_number) for slot in slots),
+            self._rpc("eth_getCode", [address, block]),
+            return_exceptions=True
+        )
+        bytecode = values[-1] if isinstance(values[-1], str) else ""
+        return dict(zip(slots, values[:-1])), bytecode
+    
+    async def _rpc_raw(self, method: str, params: List[Any]) -> Dict[str, Any]:
+        """
+        通过共享的aiohttp会话发送单个JSON-RPC请求（不阻塞事件循环）
+        
+        Args:
+            method: RPC方法名
+            params: RPC参数
+            
+        Returns:
+            完整的响应对象；连接失败或响应无法解析时返回只含error字段的对象
+        """
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        try:
+            session = await self._http()
+            async with session.post(self.web3_provider, json=payload,
+                                    timeout=aiohttp.ClientTimeout(total=10)) as response:
+                body = loads_json(await response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            return {"error": str(e)}
+        
+        return body if isinstance(body, dict) else {"error": body}
+    
+    async def _rpc(self, method: str, params: List[Any]) -> Any:
+        """
+        发送单个JSON-RPC请求并返回result字段（调用失败时抛出ValueError）
+        
+        Args:
+            method: RPC方法名
+            params: RPC参数
+            
+        Returns:
+            响应中的result字段
+        """
+        body = await self._rpc_raw(method, params)
+        if "result" not in body:
+            raise ValueError(f"{method} 调用失败: {body.get('error')}")
+        return body["result"]
+    
+    async def _read_storage_slot(self, address: str, slot: str, block_number: Optional[int] = None) -> bytes:
+        """读取存储槽数据（原始字节，读取失败时为空存储槽）"""
+        result = (await self._rpc_raw("eth_getStorageAt", [address, slot, _block_param(block_number)])).get("result")
+        if not isinstance(result, str) or not result.startswith("0x"):
+            return self.ZERO_WORD
+        
+        # 部分节点会省略前导0，补齐为32字节
+        return bytes.fromhex(result[2:].zfill(64))
     
     async def _analyze_bytecode_patterns(self, address: str, bytecode: str) -> Optional[ProxyInfo]:
         """
@@ -175,25 +374,36 @@ class SourceCodeFetcher:
         Returns:
             代理信息（如果检测到代理模式）
         """
-        # 检查常见的代理字节码模式
+        cache_key = hashlib.blake2b(bytecode.encode('ascii', 'replace'), digest_size=16).digest()
+        impl_address = _BYTECODE_PATTERN_CACHE.get(cache_key, _NOT_CACHED)
+        if impl_address is _NOT_CACHED:
+            impl_address = self._match_bytecode_patterns(bytecode)
+            _BYTECODE_PATTERN_CACHE.set(cache_key, impl_address)
+        
+        if impl_address:
+            return ProxyInfo(
+                proxy_address=address,
+                implementation_address=impl_address,
+                proxy_type="EIP-1167 Minimal Proxy"
+            )
+        
+        return None
+    
+    @staticmethod
+    def _match_bytecode_patterns(bytecode: str) -> Optional[str]:
+        """扫描字节码中的代理模式，返回实现地址"""
+        # 不含DELEGATECALL（0xf4）的合约不可能是代理，跳过模式扫描
+        if "f4" not in bytecode:
+            return None
         
         # Minimal Proxy (EIP-1167) 模式
-        if "363d3d373d3d3d363d73" in bytecode and "5af43d82803e903d91602b57fd5bf3" in bytecode:
-            # 提取实现地址
-            start_idx = bytecode.find("363d3d373d3d3d363d73") + len("363d3d373d3d3d363d73")
-            impl_address = "0x" + bytecode[start_idx:start_idx+40]
-            if is_address(impl_address):
-                return ProxyInfo(
-                    proxy_address=address,
-                    implementation_address=to_checksum_address(impl_address),
-                    proxy_type="EIP-1167 Minimal Proxy"
-                )
+        match = _EIP1167_RE.search(bytecode)
+        if match:
+            # 正则已保证是40位十六进制，无需再校验地址格式
+            return _to_checksum_address("0x" + match.group(1))
         
-        # 检查DELEGATECALL模式
-        if "f4" in bytecode:  # DELEGATECALL opcode
-            # 这可能是一个自定义代理实现
-            # 需要更复杂的分析来确定实现地址
-            pass
+        # 其他DELEGATECALL模式可能是自定义代理实现，
+        # 需要更复杂的分析来确定实现地址
         
         return None
     
@@ -210,6 +420,31 @@ class SourceCodeFetcher:
         if not self.etherscan_api_key:
             return None, None, None, False, None
         
+        cache_key = (self.etherscan_base_url, address.lower())
+        cached = _ETHERSCAN_DATA_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # 已验证合约的源代码不会改变，进程重启后从磁盘缓存读取，不消耗Etherscan配额
+        cached = self._load_from_disk(cache_key)
+        if cached is not None:
+            _ETHERSCAN_DATA_CACHE.set(cache_key, cached)
+            return cached
+        
+        # 同一合约的并发查询只请求一次Etherscan
+        return await _ETHERSCAN_DATA_FLIGHT.run(cache_key, lambda: self._request_etherscan_data(address, cache_key))
+    
+    async def _request_etherscan_data(self, address: str, cache_key: Tuple[str, str]) -> Tuple[Optional[str], Optional[List[Dict]], Optional[str], bool, Optional[str]]:
+        """
+        请求Etherscan getsourcecode接口并缓存成功的结果
+        
+        Args:
+            address: 合约地址
+            cache_key: 缓存键
+            
+        Returns:
+            (源代码, ABI, 构造参数, 验证状态, 编译器版本)
+        """
         try:
             # 获取源代码
             params = {
@@ -219,10 +454,17 @@ class SourceCodeFetcher:
                 "apikey": self.etherscan_api_key
             }
             
-            response = requests.get(self.etherscan_base_url, params=params, timeout=10)
-            data = response.json()
+            session = await self._http()
+            async with self._rate_limiter, session.get(self.etherscan_base_url, params=params,
+                                                       timeout=aiohttp.ClientTimeout(total=10)) as response:
+                body = await response.read()
+            
+            if _UNVERIFIED_MARKER in body:
+                _ETHERSCAN_DATA_CACHE.set(cache_key, _UNVERIFIED_DATA, ttl=_UNVERIFIED_TTL)
+                return _UNVERIFIED_DATA
             
-            if data["status"] == "1" and data["result"]:
+            data = loads_json(body)
+            if data.get("status") == "1" and data["result"]:
                 result = data["result"][0]
                 
                 source_code = result.get("SourceCode", "")
@@ -234,19 +476,45 @@ class SourceCodeFetcher:
                 abi = None
                 if abi_str and abi_str != "Contract source code not verified":
                     try:
-                        abi = json.loads(abi_str)
+                        abi = loads_json(abi_str)
                     except json.JSONDecodeError:
                         abi = None
                 
                 verification_status = bool(source_code and source_code != "")
                 
-                return source_code, abi, constructor_args, verification_status, compiler_version
+                etherscan_data = (source_code, abi, constructor_args, verification_status, compiler_version)
+                _ETHERSCAN_DATA_CACHE.set(cache_key, etherscan_data, ttl=None if verification_status else _UNVERIFIED_TTL)
+                if verification_status:
+                    self._save_to_disk(cache_key, etherscan_data)
+                return etherscan_data
             
         except Exception as e:
             print(f"获取Etherscan数据时出错: {e}")
         
         return None, None, None, False, None
     
+    def _load_from_disk(self, cache_key: Tuple[str, str]) -> Optional[Tuple[Optional[str], Optional[List[Dict]], Optional[str], bool, Optional[str]]]:
+        """从持久化缓存读取已验证合约的Etherscan数据"""
+        if self._disk_cache is None:
+            return None
+        
+        try:
+            value = self._disk_cache.get("|".join(cache_key))
+            return tuple(loads_json(value)) if value is not None else None
+        except Exception as e:
+            print(f"读取源代码缓存失败: {e}")
+            return None
+    
+    def _save_to_disk(self, cache_key: Tuple[str, str], etherscan_data: Tuple):
+        """将已验证合约的Etherscan数据写入持久化缓存"""
+        if self._disk_cache is None:
+            return
+        
+        try:
+            self._disk_cache.set("|".join(cache_key), json.dumps(etherscan_data, separators=(',', ':')).encode('utf-8'))
+        except Exception as e:
+            print(f"写入源代码缓存失败: {e}")
+    
     def get_implementation_at_block(self, proxy_address: str, block_number: int) -> Optional[str]:
         """
         获取特定区块高度时的实现合约地址
@@ -259,13 +527,7 @@ class SourceCodeFetcher:
             实现合约地址
         """
         # 检查各种代理标准的实现槽
-        slots_to_check = [
-            self.EIP1967_IMPLEMENTATION_SLOT,
-            self.EIP1822_LOGIC_SLOT,
-            self.OPENZEPPELIN_IMPLEMENTATION_SLOT
-        ]
-        
-        for slot in slots_to_check:
+        for _, slot, _ in self._PROXY_SLOTS:
             try:
                 storage_value = self.w3.eth.get_storage_at(
                     proxy_address, 
@@ -273,10 +535,9 @@ class SourceCodeFetcher:
                     block_identifier=block_number
                 )
                 
-                if storage_value != b'\x00' * 32:
-                    implementation_address = "0x" + storage_value.hex()[-40:]
-                    if is_address(implementation_address):
-                        return to_checksum_address(implementation_address)
+                implementation_address = self._slot_to_address(storage_value)
+                if implementation_address:
+                    return implementation_address
             except Exception:
                 continue
         
@@ -293,12 +554,14 @@ class SourceCodeFetcher:
         Returns:
             地址到合约信息的映射
         """
-        tasks = []
-        for address in addresses:
-            task = self.fetch_contract_info(address, block_number)
-            tasks.append(task)
+        # 限制并发数，避免触发Etherscan的请求频率限制
+        semaphore = asyncio.Semaphore(max(1, self.max_workers))
+        
+        async def fetch(address: str) -> ContractInfo:
+            async with semaphore:
+                return await self.fetch_contract_info(address, block_number)
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await asyncio.gather(*(fetch(address) for address in addresses), return_exceptions=True)
         
         contract_info_map = {}
         for i, result in enumerate(results):
@@ -339,6 +602,8 @@ async def main():
     contract_map = await fetcher.batch_fetch_contracts(addresses)
     for addr, info in contract_map.items():
         print(f"{addr}: 验证状态 = {info.verification_status}")
+    
+    await fetcher.close()
 
 
 if __name__ == "__main__":
@@ -6,15 +6,43 @@ Constructor Parameter Tool
 为代理提供配置上下文，包括代币地址、费用规格和访问控制参数。
 """
 
-import json
 import re
+import asyncio
 from typing import Dict, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass
 from web3 import Web3
-from eth_utils import to_checksum_address, decode_hex
-from eth_abi import decode as decode_abi
+from eth_utils import to_checksum_address
+from eth_abi import decode as abi_decode
+import aiohttp
 import requests
 
+from cache_utils import TTLCache
+from http_utils import RateLimiter, create_aiohttp_session
+from json_utils import loads_json
+
+
+# ABI编码长度（32字节槽）：定长标量类型、动态类型、定长数组
+_SCALAR_PARAM_LENGTHS = {'address': 1, 'bool': 1, 'bytes32': 1}
+_DYNAMIC_PARAM_TYPES = frozenset({'string', 'bytes'})
+_FIXED_ARRAY_RE = re.compile(r'^(.+)\[(\d+)\]$')
+
+# ABI中是否存在构造函数条目（不存在时无需完整解析ABI）
+_CONSTRUCTOR_ENTRY_RE = re.compile(r'"type"\s*:\s*"constructor"')
+
+# Etherscan请求的重试次数和退避基数（秒）
+_HTTP_RETRIES = 3
+_HTTP_BACKOFF = 0.2
+
+# 合约名称并发查询上限（Etherscan免费接口约5次/秒）
+_NAME_LOOKUP_CONCURRENCY = 5
+
+# 通过区块搜索找到的合约创建交易，键为 (RPC端点, 小写合约地址)，跨工具实例共享；
+# 创建交易不会改变，只需限制条目数
+_CREATION_TX_CACHE = TTLCache(maxsize=4096, ttl=86400)
+
+# JSON-RPC "方法不存在" 错误码（节点不支持 eth_getBlockReceipts）
+_METHOD_NOT_FOUND = -32601
+
 
 @dataclass
 class ConstructorParam:
@@ -23,6 +51,7 @@ class ConstructorParam:
     type: str
     value: Any
     decoded_value: Optional[str] = None  # 人类可读的解码值
+    contract_name: Optional[str] = None  # 地址参数对应的合约名称（按需查询）
 
 
 @dataclass
@@ -42,7 +71,9 @@ class DeploymentInfo:
 class ConstructorParameterTool:
     """构造函数参数分析工具"""
     
-    def __init__(self, web3_provider: str, etherscan_api_key: Optional[str] = None, etherscan_base_url: Optional[str] = None):
+    def __init__(self, web3_provider: str, etherscan_api_key: Optional[str] = None, etherscan_base_url: Optional[str] = None,
+                 session: Optional[aiohttp.ClientSession] = None, http_session: Optional[requests.Session] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
         """
         初始化构造函数参数工具
         
@@ -50,17 +81,71 @@ class ConstructorParameterTool:
             web3_provider: Web3提供商URL
             etherscan_api_key: Etherscan API密钥
             etherscan_base_url: Etherscan API基础URL
+            session: 共享的aiohttp会话（为空时在首次请求时自行创建）
+            http_session: 共享的requests会话（供Web3 HTTPProvider复用连接池）
+            rate_limiter: 共享的Etherscan请求限速器（为空时不限速）
         """
-        self.w3 = Web3(Web3.HTTPProvider(web3_provider))
+        self.w3 = Web3(Web3.HTTPProvider(web3_provider, session=http_session))
         self.etherscan_api_key = etherscan_api_key
         self.etherscan_base_url = etherscan_base_url or "https://api.etherscan.io/api"
+        
+        # 异步HTTP会话（keep-alive + 连接池），不阻塞事件循环
+        self._session = session
+        self._owns_session = session is None
+        self._rate_limiter = rate_limiter or RateLimiter(0)
+        
+        # 节点是否支持 eth_getBlockReceipts（None表示尚未探测）
+        self._block_receipts_supported: Optional[bool] = None
+        
+        # Etherscan查询结果缓存（LRU + TTL）：getsourcecode原始结果供构造函数ABI和
+        # 合约名称查询共用，解析后的ABI和名称单独缓存
+        self._source_code_cache = TTLCache(maxsize=1024, ttl=3600)
+        self._constructor_abi_cache = TTLCache(maxsize=1024, ttl=3600)
+        self._contract_name_cache = TTLCache(maxsize=1024, ttl=3600)
     
-    async def analyze_constructor_params(self, contract_address: str) -> DeploymentInfo:
+    async def _http(self) -> aiohttp.ClientSession:
+        """获取HTTP会话（需在事件循环中创建，因此延迟到首次请求）"""
+        if self._session is None or self._session.closed:
+            self._session = create_aiohttp_session(limit=20, limit_per_host=10)
+            self._owns_session = True
+        return self._session
+    
+    async def close(self):
+        """关闭自行创建的HTTP会话"""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def _etherscan_get(self, params: Dict[str, Any], timeout: float = 10) -> Dict:
+        """
+        请求Etherscan API（连接错误和超时时按指数退避重试）
+        
+        Args:
+            params: 查询参数
+            timeout: 单次请求超时（秒）
+            
+        Returns:
+            响应JSON
+        """
+        session = await self._http()
+        for attempt in range(_HTTP_RETRIES):
+            try:
+                async with self._rate_limiter, session.get(self.etherscan_base_url, params=params,
+                                                           timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    return loads_json(await response.read())
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == _HTTP_RETRIES - 1:
+                    raise
+                await asyncio.sleep(_HTTP_BACKOFF * 2 ** attempt)
+    
+    async def analyze_constructor_params(self, contract_address: str, resolve_names: bool = True) -> DeploymentInfo:
         """
         分析合约的构造函数参数
         
         Args:
             contract_address: 合约地址
+            resolve_names: 是否查询地址参数对应的合约名称；为False时可稍后
+                按需调用 resolve_contract_names
             
         Returns:
             部署信息
@@ -77,14 +162,19 @@ class ConstructorParameterTool:
         # 获取合约ABI和构造函数信息
         constructor_abi = await self._get_constructor_abi(contract_address)
         
+        # 运行时字节码只获取一次，供参数解码和部署信息共用
+        runtime_code = self.w3.eth.get_code(contract_address).hex()
+        
         # 分析calldata提取构造函数参数
         constructor_params = []
         if constructor_abi and tx_detail['input']:
-            constructor_params = await self._decode_constructor_params(
+            constructor_params = self._decode_constructor_params(
                 tx_detail['input'], 
                 constructor_abi,
-                contract_address
+                runtime_code
             )
+            if resolve_names:
+                await self.resolve_contract_names(constructor_params)
         
         return DeploymentInfo(
             contract_address=contract_address,
@@ -95,7 +185,7 @@ class ConstructorParameterTool:
             gas_price=tx_detail['gasPrice'],
             constructor_params=constructor_params,
             creation_code=tx_detail['input'],
-            runtime_code=self.w3.eth.get_code(contract_address).hex()
+            runtime_code=runtime_code
         )
     
     async def _get_contract_creation_tx(self, contract_address: str) -> Optional[Dict]:
@@ -118,8 +208,7 @@ class ConstructorParameterTool:
                     "apikey": self.etherscan_api_key
                 }
                 
-                response = requests.get(self.etherscan_base_url, params=params, timeout=10)
-                data = response.json()
+                data = await self._etherscan_get(params)
                 
                 if data["status"] == "1" and data["result"]:
                     result = data["result"][0]
@@ -143,6 +232,11 @@ class ConstructorParameterTool:
         Returns:
             创建交易信息
         """
+        cache_key = (str(getattr(self.w3.provider, 'endpoint_uri', '')), contract_address.lower())
+        cached = _CREATION_TX_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             # 获取合约的第一个交易（通常是创建交易）
             latest_block = self.w3.eth.block_number
@@ -160,19 +254,18 @@ class ConstructorParameterTool:
                 else:
                     start_block = mid_block + 1
             
-            # 在目标区块附近搜索创建交易
+            # 在目标区块附近搜索创建交易，由近及远（二分结果通常就是创建区块）
             target_block = start_block
-            for block_num in range(max(0, target_block - 10), target_block + 10):
+            candidate_blocks = sorted(
+                range(max(0, target_block - 10), target_block + 10),
+                key=lambda block_num: abs(block_num - target_block)
+            )
+            for block_num in candidate_blocks:
                 try:
-                    block = self.w3.eth.get_block(block_num, full_transactions=True)
-                    for tx in block['transactions']:
-                        if tx['to'] is None:  # 合约创建交易
-                            receipt = self.w3.eth.get_transaction_receipt(tx['hash'])
-                            if receipt['contractAddress'] and receipt['contractAddress'].lower() == contract_address.lower():
-                                return {
-                                    'hash': tx['hash'].hex(),
-                                    'creator': tx['from']
-                                }
+                    creation_tx = self._find_creation_tx_in_block(block_num, contract_address)
+                    if creation_tx:
+                        _CREATION_TX_CACHE.set(cache_key, creation_tx)
+                        return creation_tx
                 except Exception:
                     continue
         
@@ -181,6 +274,52 @@ class ConstructorParameterTool:
         
         return None
     
+    def _find_creation_tx_in_block(self, block_num: int, contract_address: str) -> Optional[Dict]:
+        """
+        在指定区块中查找合约的创建交易
+        
+        优先使用 eth_getBlockReceipts 一次取回整块的收据（收据中直接包含
+        contractAddress），节点不支持时退回到完整交易加逐笔收据查询。
+        
+        Args:
+            block_num: 区块号
+            contract_address: 合约地址
+            
+        Returns:
+            创建交易信息
+        """
+        target = contract_address.lower()
+        
+        if self._block_receipts_supported is not False:
+            response = self.w3.provider.make_request('eth_getBlockReceipts', [hex(block_num)])
+            receipts = response.get('result') if isinstance(response, dict) else None
+            if receipts is not None:
+                self._block_receipts_supported = True
+                for receipt in receipts:
+                    created = receipt.get('contractAddress')
+                    if created and created.lower() == target:
+                        return {
+                            'hash': receipt['transactionHash'],
+                            'creator': to_checksum_address(receipt['from'])
+                        }
+                return None
+            # 只有明确返回方法不存在时才认为节点不支持，限速等临时错误下次仍会尝试
+            error = response.get('error') if isinstance(response, dict) else None
+            if isinstance(error, dict) and error.get('code') == _METHOD_NOT_FOUND:
+                self._block_receipts_supported = False
+        
+        block = self.w3.eth.get_block(block_num, full_transactions=True)
+        for tx in block['transactions']:
+            if tx['to'] is None:  # 合约创建交易
+                receipt = self.w3.eth.get_transaction_receipt(tx['hash'])
+                if receipt['contractAddress'] and receipt['contractAddress'].lower() == target:
+                    return {
+                        'hash': tx['hash'].hex(),
+                        'creator': tx['from']
+                    }
+        
+        return None
+    
     async def _get_constructor_abi(self, contract_address: str) -> Optional[Dict]:
         """
         获取构造函数ABI
@@ -194,27 +333,24 @@ class ConstructorParameterTool:
         if not self.etherscan_api_key:
             return None
         
+        cached = self._constructor_abi_cache.get(contract_address)
+        if cached is not None:
+            return cached
+        
         try:
-            params = {
-                "module": "contract",
-                "action": "getsourcecode",
-                "address": contract_address,
-                "apikey": self.etherscan_api_key
-            }
-            
-            response = requests.get(self.etherscan_base_url, params=params, timeout=10)
-            data = response.json()
+            result = await self._get_source_code_result(contract_address)
             
-            if data["status"] == "1" and data["result"]:
-                result = data["result"][0]
+            if result:
                 abi_str = result.get("ABI", "")
                 
-                if abi_str and abi_str != "Contract source code not verified":
-                    abi = json.loads(abi_str)
+                if (abi_str and abi_str != "Contract source code not verified"
+                        and _CONSTRUCTOR_ENTRY_RE.search(abi_str)):
+                    abi = loads_json(abi_str)
                     
                     # 查找构造函数
                     for item in abi:
                         if item.get("type") == "constructor":
+                            self._constructor_abi_cache.set(contract_address, item)
                             return item
             
         except Exception as e:
@@ -222,14 +358,44 @@ class ConstructorParameterTool:
         
         return None
     
-    async def _decode_constructor_params(self, calldata: str, constructor_abi: Dict, contract_address: str) -> List[ConstructorParam]:
+    async def _get_source_code_result(self, address: str) -> Optional[Dict]:
+        """
+        查询Etherscan getsourcecode接口（按地址缓存成功的结果）
+        
+        Args:
+            address: 合约地址
+            
+        Returns:
+            getsourcecode结果的第一项，查询无结果时返回None
+        """
+        cached = self._source_code_cache.get(address)
+        if cached is not None:
+            return cached
+        
+        params = {
+            "module": "contract",
+            "action": "getsourcecode",
+            "address": address,
+            "apikey": self.etherscan_api_key
+        }
+        
+        data = await self._etherscan_get(params)
+        
+        if data["status"] == "1" and data["result"]:
+            result = data["result"][0]
+            self._source_code_cache.set(address, result)
+            return result
+        
+        return None
+    
+    def _decode_constructor_params(self, calldata: str, constructor_abi: Dict, runtime_code: str) -> List[ConstructorParam]:
         """
         解码构造函数参数
         
         Args:
             calldata: 交易的输入数据
             constructor_abi: 构造函数ABI
-            contract_address: 合约地址
+            runtime_code: 合约运行时字节码（十六进制）
             
         Returns:
             构造函数参数列表
@@ -250,23 +416,21 @@ class ConstructorParameterTool:
             
             # 分离创建代码和构造函数参数
             # 通常构造函数参数附加在合约字节码之后
-            runtime_code = self.w3.eth.get_code(contract_address).hex()
-            
             # 尝试找到构造函数参数的起始位置
-            constructor_params_data = await self._extract_constructor_params_from_calldata(
+            constructor_params_data = self._extract_constructor_params_from_calldata(
                 calldata, runtime_code, param_types
             )
             
             if constructor_params_data:
-                # 解码参数
-                decoded_values = decode_abi(param_types, decode_hex(constructor_params_data))
+                # 解码参数（提取结果带0x前缀）
+                decoded_values = abi_decode(param_types, bytes.fromhex(constructor_params_data[2:]))
                 
                 for i, value in enumerate(decoded_values):
                     param_name = param_names[i] if i < len(param_names) else f"param_{i}"
                     param_type = param_types[i]
                     
-                    # 解码特殊类型的值
-                    decoded_value = await self._decode_special_value(value, param_type)
+                    # 解码特殊类型的值（不涉及网络请求，合约名称按需另行查询）
+                    decoded_value = self._decode_special_value(value, param_type)
                     
                     params.append(ConstructorParam(
                         name=param_name,
@@ -280,7 +444,7 @@ class ConstructorParameterTool:
         
         return params
     
-    async def _extract_constructor_params_from_calldata(self, calldata: str, runtime_code: str, param_types: List[str]) -> Optional[str]:
+    def _extract_constructor_params_from_calldata(self, calldata: str, runtime_code: str, param_types: List[str]) -> Optional[str]:
         """
         从calldata中提取构造函数参数
         
@@ -300,11 +464,14 @@ class ConstructorParameterTool:
             # 尝试多种方法找到构造函数参数
             
             # 方法1: 如果运行时代码在calldata中，参数在其后
-            if runtime_code in calldata:
-                runtime_code_end = calldata.find(runtime_code) + len(runtime_code)
-                constructor_params = calldata[runtime_code_end:]
+            # 在字节上只查找一次：数据量减半，且不会在半字节错位处误匹配
+            calldata_bytes = bytes.fromhex(calldata)
+            runtime_code_bytes = bytes.fromhex(runtime_code)
+            runtime_code_start = calldata_bytes.find(runtime_code_bytes) if runtime_code_bytes else -1
+            if runtime_code_start != -1:
+                constructor_params = calldata_bytes[runtime_code_start + len(runtime_code_bytes):]
                 if constructor_params:
-                    return "0x" + constructor_params
+                    return "0x" + constructor_params.hex()
             
             # 方法2: 计算期望的参数长度
             expected_param_length = sum([self._get_param_length(param_type) for param_type in param_types])
@@ -313,11 +480,6 @@ class ConstructorParameterTool:
                 constructor_params = calldata[-expected_param_length*2:]
                 if len(constructor_params) == expected_param_length * 2:
                     return "0x" + constructor_params
-            
-            # 方法3: 使用Etherscan的构造函数参数（如果可用）
-            constructor_args = await self._get_etherscan_constructor_args(calldata)
-            if constructor_args:
-                return "0x" + constructor_args
         
         except Exception as e:
             print(f"提取构造函数参数失败: {e}")
@@ -334,43 +496,25 @@ class ConstructorParameterTool:
         Returns:
             长度（以32字节为单位）
         """
-        if param_type.startswith('uint') or param_type.startswith('int'):
-            return 1
-        elif param_type == 'address':
-            return 1
-        elif param_type == 'bool':
-            return 1
-        elif param_type == 'bytes32':
+        length = _SCALAR_PARAM_LENGTHS.get(param_type)
+        if length is not None:
+            return length
+        if param_type.startswith(('uint', 'int')):
             return 1
-        elif param_type == 'string' or param_type == 'bytes':
-            return -1  # 动态长度
-        elif param_type.endswith('[]'):
-            return -1  # 动态数组
-        elif '[' in param_type and ']' in param_type:
-            # 固定长度数组
-            match = re.search(r'\[(\d+)\]', param_type)
-            if match:
-                array_length = int(match.group(1))
-                base_type = param_type[:param_type.find('[')]
-                return array_length * self._get_param_length(base_type)
+        if param_type in _DYNAMIC_PARAM_TYPES or param_type.endswith('[]'):
+            return -1  # 动态长度 / 动态数组
         
-        return 1  # 默认值
-    
-    async def _get_etherscan_constructor_args(self, calldata: str) -> Optional[str]:
-        """
-        从Etherscan获取构造函数参数
+        # 固定长度数组
+        match = _FIXED_ARRAY_RE.match(param_type)
+        if match:
+            base_length = self._get_param_length(match.group(1))
+            if base_length < 0:
+                return -1  # 元素为动态类型
+            return int(match.group(2)) * base_length
         
-        Args:
-            calldata: 交易输入数据
-            
-        Returns:
-            构造函数参数数据
-        """
-        # 这里可以实现从Etherscan API获取已验证的构造函数参数
-        # 目前返回None，使用其他方法
-        return None
+        return 1  # 默认值
     
-    async def _decode_special_value(self, value: Any, param_type: str) -> Optional[str]:
+    def _decode_special_value(self, value: Any, param_type: str) -> Optional[str]:
         """
         解码特殊类型的值为人类可读格式
         
@@ -388,15 +532,7 @@ class ConstructorParameterTool:
                 else:
                     address = value
                 
-                # 检查是否为已知合约
-                checksum_addr = to_checksum_address(address)
-                
-                # 尝试获取合约名称（如果有的话）
-                contract_name = await self._get_contract_name(checksum_addr)
-                if contract_name:
-                    return f"{checksum_addr} ({contract_name})"
-                
-                return checksum_addr
+                return to_checksum_address(address)
             
             elif param_type.startswith('uint') and isinstance(value, int):
                 # 对于大数值，提供更可读的格式
@@ -411,7 +547,7 @@ class ConstructorParameterTool:
                 # 尝试解码为字符串
                 try:
                     decoded_str = value.decode('utf-8').rstrip('\x00')
-                    if decoded_str and all(c.isprintable() for c in decoded_str):
+                    if decoded_str and decoded_str.isprintable():
                         return f"'{decoded_str}'"
                 except:
                     pass
@@ -428,6 +564,47 @@ class ConstructorParameterTool:
         
         return str(value)
     
+    async def resolve_contract_names(self, params: List[ConstructorParam]) -> List[ConstructorParam]:
+        """
+        为地址类型参数查询合约名称并补充到可读值中
+        
+        同一地址只查询一次，不同地址并发查询（受并发上限约束）；已查询过名称的参数会被跳过，
+        单个地址查询失败不影响其他参数。
+        
+        Args:
+            params: 构造函数参数列表
+            
+        Returns:
+            原参数列表（原地更新）
+        """
+        pending = [
+            param for param in params
+            if param.type == 'address' and param.contract_name is None and param.decoded_value
+        ]
+        if not pending:
+            return params
+        
+        addresses = list(dict.fromkeys(param.decoded_value for param in pending))
+        semaphore = asyncio.Semaphore(_NAME_LOOKUP_CONCURRENCY)
+        
+        async def lookup(address: str) -> Optional[str]:
+            async with semaphore:
+                return await self._get_contract_name(address)
+        
+        names = await asyncio.gather(*(lookup(address) for address in addresses), return_exceptions=True)
+        name_map = {
+            address: name for address, name in zip(addresses, names)
+            if not isinstance(name, BaseException)
+        }
+        
+        for param in pending:
+            contract_name = name_map.get(param.decoded_value)
+            if contract_name:
+                param.contract_name = contract_name
+                param.decoded_value = f"{param.decoded_value} ({contract_name})"
+        
+        return params
+    
     async def _get_contract_name(self, address: str) -> Optional[str]:
         """
         获取合约名称（如果可用）
@@ -441,20 +618,18 @@ class ConstructorParameterTool:
         if not self.etherscan_api_key:
             return None
         
+        cached = self._contract_name_cache.get(address)
+        if cached is not None:
+            return cached
+        
         try:
-            params = {
-                "module": "contract",
-                "action": "getsourcecode",
-                "address": address,
-                "apikey": self.etherscan_api_key
-            }
-            
-            response = requests.get(self.etherscan_base_url, params=params, timeout=5)
-            data = response.json()
+            result = await self._get_source_code_result(address)
             
-            if data["status"] == "1" and data["result"]:
-                result = data["result"][0]
-                return result.get("ContractName", None)
+            if result:
+                contract_name = result.get("ContractName", None)
+                if contract_name:
+                    self._contract_name_cache.set(address, contract_name)
+                return contract_name
         
         except Exception:
             pass
@@ -500,12 +675,15 @@ async def main():
         etherscan_api_key="YOUR_ETHERSCAN_API_KEY"
     )
     
-    # 分析合约构造函数参数
-    contract_address = "0xA0b86a33E6441E09e5fDE7f80b0138b43A5A9b27"
-    deployment_info = await tool.analyze_constructor_params(contract_address)
-    
-    # 打印格式化的部署信息
-    print(tool.format_deployment_info(deployment_info))
+    try:
+        # 分析合约构造函数参数
+        contract_address = "0xA0b86a33E6441E09e5fDE7f80b0138b43A5A9b27"
+        deployment_info = await tool.analyze_constructor_params(contract_address)
+        
+        # 打印格式化的部署信息
+        print(tool.format_deployment_info(deployment_info))
+    finally:
+        await tool.close()
 
 
 if __name__ == "__main__":
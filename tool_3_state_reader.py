@@ -6,15 +6,160 @@ State Reader Tool
 使代理能够通过批量调用在目标区块捕获合约状态快照。
 """
 
-import json
 import asyncio
+import hashlib
+import re
+from functools import lru_cache
 from typing import Dict, List, Optional, Any, Tuple, Union
-from dataclasses import dataclass, asdict
-from web3 import Web3
-from web3.contract import Contract
+from dataclasses import dataclass
+from web3 import Web3, AsyncWeb3, AsyncHTTPProvider
+from web3.contract import AsyncContract
 from eth_utils import to_checksum_address
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from eth_abi import decode as abi_decode, encode as abi_encode
+import aiohttp
+
+from cache_utils import TTLCache, SingleFlight, DiskCache
+from http_utils import RateLimiter, create_aiohttp_session
+from json_utils import loads_json, write_json
+
+# 可选依赖 - pycryptodome（直接计算keccak256，跳过Web3.keccak的参数转换）
+try:
+    from Crypto.Hash import keccak as _keccak
+    HAS_PYCRYPTODOME = True
+except ImportError:
+    HAS_PYCRYPTODOME = False
+
+
+# 单个JSON-RPC批量请求中的最大调用数（避免超出节点的批量上限）
+_RPC_BATCH_SIZE = 100
+
+# Multicall3合约（主流EVM链上地址相同）：aggregate3在一次eth_call中执行多个调用，单个调用失败不影响其他调用
+_MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+_AGGREGATE3_SELECTOR = "82ad56cb"  # aggregate3((address,bool,bytes)[])
+# 回滚数据的前缀：Error(string) 和 Panic(uint256)
+_ERROR_STRING_SELECTOR = bytes.fromhex("08c379a0")
+_PANIC_SELECTOR = bytes.fromhex("4e487b71")
+# 每个aggregate3调用包含的最大调用数（避免超出节点的eth_call gas上限和响应大小上限）
+_MULTICALL_CHUNK_SIZE = 50
+
+# 合约ABI缓存，键为 (Etherscan API地址, 小写合约地址)，跨工具实例共享
+_ABI_CACHE = TTLCache(maxsize=4096, ttl=86400)
+_ABI_FLIGHT = SingleFlight()
+
+# 按字节码摘要共享的ABI，键为 (Etherscan API地址, 字节码的blake2b摘要)；
+# 最小代理和工厂部署的克隆合约字节码相同，同一批次中只需请求一次Etherscan
+_ABI_BY_CODE_CACHE = TTLCache(maxsize=4096, ttl=86400)
+_ABI_BY_CODE_FLIGHT = SingleFlight()
+
+# Etherscan触发频率限制（返回NOTOK）时的重试次数和退避基数（秒）
+_ETHERSCAN_RETRIES = 3
+_ETHERSCAN_BACKOFF = 1.0
+
+# eth_call结果缓存，键为 (RPC端点, 合约地址, 调用数据, 区块号)；
+# 固定区块上的调用结果不变，较短的TTL用于应对链头附近的重组
+_ETH_CALL_CACHE = TTLCache(maxsize=4096, ttl=60)
+
+# 正在请求中的eth_call（键同上），并发的相同调用合并为一次请求
+_ETH_CALL_INFLIGHT: Dict[Tuple, asyncio.Future] = {}
+
+# eth_call结果持久化缓存的模式：enabled（读写）、readonly（只读不写）、replay（只使用缓存，不发送请求）、disabled（不使用）；
+# 每个新区块的快照都会写入新的结果，默认不启用以免缓存文件无限增长
+_CALL_CACHE_MODES = ("enabled", "readonly", "replay", "disabled")
+
+# 使用默认参数调用几乎总是回滚或没有意义的函数名（正则），未提供调用参数时直接跳过以节省RPC请求
+_SKIP_PARAM_PATTERNS = (
+    r"allowance", r"balanceOf", r"ownerOf", r"tokenURI", r"getApproved", r"isApprovedForAll",
+    r"tokenOfOwnerByIndex", r"getAmounts(?:In|Out)", r"quote",
+)
+
+# 有参数函数的默认调用参数：按类型名直接查表，整数类型用正则匹配
+_TYPE_DEFAULTS = {
+    "address": "0x" + "0" * 40,
+    "bool": False,
+    "bytes32": "0x" + "0" * 64,
+    "string": "",
+    "bytes": b"",
+}
+_INT_TYPE_RE = re.compile(r"u?int\d*$")
+_MISSING = object()
+
+# ABI解析出的view函数列表缓存，键同 _ABI_CACHE，值为 (ABI对象, view函数列表)；
+# 同一合约重复捕获时无需重新解析ABI和计算选择器（ABI缓存中的对象被替换后自动失效）
+_VIEW_FUNCTIONS_CACHE = TTLCache(maxsize=1024, ttl=86400)
+
+
+def _abi_type_string(param: Dict[str, Any]) -> str:
+    """
+    获取ABI参数的规范类型字符串（tuple展开为组件类型）
+    
+    Args:
+        param: ABI参数定义
+        
+    Returns:
+        类型字符串，如 "uint256"、"(address,uint256)[]"
+    """
+    param_type = param["type"]
+    if param_type.startswith("tuple"):
+        components = ",".join(_abi_type_string(c) for c in param.get("components", []))
+        return f"({components}){param_type[len('tuple'):]}"
+    return param_type
+
+
+def _normalize_addresses(value: Any, param: Dict[str, Any]) -> Any:
+    """
+    将解码结果中的地址转换为校验和格式（递归处理数组和tuple组件，与web3返回值的规范化一致）
+    
+    Args:
+        value: eth_abi解码出的值
+        param: 对应的ABI参数定义
+        
+    Returns:
+        规范化后的值
+    """
+    param_type = param.get("type", "")
+    if param_type.endswith("]"):
+        # 数组：去掉最外层维度后逐个元素处理
+        element = dict(param, type=param_type[:param_type.rindex("[")])
+        return tuple(_normalize_addresses(item, element) for item in value)
+    if param_type == "tuple":
+        return tuple(_normalize_addresses(item, component)
+                     for item, component in zip(value, param.get("components", [])))
+    if param_type == "address" and isinstance(value, str):
+        return to_checksum_address(value)
+    return value
+
+
+@lru_cache(maxsize=8192)
+def _build_function_signature(name: str, param_types: Tuple[str, ...]) -> str:
+    """
+    构建函数签名
+    
+    Args:
+        name: 函数名
+        param_types: 参数类型
+        
+    Returns:
+        函数签名字符串
+    """
+    return f"{name}({','.join(param_types)})"
+
+
+@lru_cache(maxsize=8192)
+def _selector_for(signature: str) -> str:
+    """
+    计算函数选择器（签名keccak哈希的前4字节）
+    
+    Args:
+        signature: 函数签名
+        
+    Returns:
+        十六进制选择器
+    """
+    if HAS_PYCRYPTODOME:
+        digest = _keccak.new(data=signature.encode('utf-8'), digest_bits=256).digest()
+    else:
+        digest = bytes(Web3.keccak(text=signature))
+    return "0x" + digest[:4].hex()
 
 
 @dataclass
@@ -51,52 +196,109 @@ class BatchCallResult:
 class StateReaderTool:
     """状态读取工具"""
     
-    def __init__(self, web3_provider: str, etherscan_api_key: Optional[str] = None, max_workers: int = 10, etherscan_base_url: Optional[str] = None):
+    def __init__(self, web3_provider: str, etherscan_api_key: Optional[str] = None, max_workers: int = 10, etherscan_base_url: Optional[str] = None,
+                 session: Optional[aiohttp.ClientSession] = None, rate_limiter: Optional[RateLimiter] = None,
+                 disk_cache: Optional[DiskCache] = None, skip_param_patterns: Optional[List[str]] = None,
+                 call_cache_mode: str = "disabled"):
         """
         初始化状态读取工具
         
         Args:
             web3_provider: Web3提供商URL
             etherscan_api_key: Etherscan API密钥
-            max_workers: 最大并发工作线程数
+            max_workers: 最大并发数（同时捕获的快照数、逐个发送的调用数和HTTP连接池大小）
             etherscan_base_url: Etherscan API基础URL
+            session: 共享的aiohttp会话（为空时在首次请求时自行创建）
+            rate_limiter: 共享的Etherscan请求限速器（为空时不限速）
+            disk_cache: 已验证合约ABI的持久化缓存（为空时只使用内存缓存）
+            skip_param_patterns: 不使用默认参数调用的函数名正则（默认为 _SKIP_PARAM_PATTERNS，传入空列表则不跳过）
+            call_cache_mode: eth_call结果持久化缓存的模式（见 _CALL_CACHE_MODES，需要提供disk_cache；默认不启用）
         """
-        self.w3 = Web3(Web3.HTTPProvider(web3_provider))
+        self.web3_provider = web3_provider
+        # 异步Web3，节点调用不阻塞事件循环；首次调用时改用共享的aiohttp会话（连接池）
+        self.w3 = AsyncWeb3(AsyncHTTPProvider(web3_provider, request_kwargs={"timeout": 30}))
+        self._provider_session_ready = False
         self.etherscan_api_key = etherscan_api_key
         self.etherscan_base_url = etherscan_base_url or "https://api.etherscan.io/api"
         self.max_workers = max_workers
+        self._rate_limiter = rate_limiter or RateLimiter(0)
+        self._disk_cache = disk_cache
+        
+        if call_cache_mode not in _CALL_CACHE_MODES:
+            raise ValueError(f"不支持的调用缓存模式: {call_cache_mode}")
+        self.call_cache_mode = call_cache_mode if disk_cache is not None else "disabled"
+        
+        if skip_param_patterns is None:
+            skip_param_patterns = _SKIP_PARAM_PATTERNS
+        self._skip_param_re = re.compile("|".join(f"(?:{p})" for p in skip_param_patterns)) if skip_param_patterns else None
+        
+        # 逐个发送的view函数调用在所有合约间共享并发上限，避免批量快照时连接数激增
+        self._call_semaphore = asyncio.Semaphore(max(1, max_workers))
+        
+        # 逐个调用所用的合约实例，键为 (合约地址, view函数签名的哈希)，重复捕获时复用
+        self._contract_cache = TTLCache(maxsize=256, ttl=86400)
+        
+        # 异步HTTP会话，用于Etherscan请求和JSON-RPC批量请求
+        self._session = session
+        self._owns_session = session is None
+    
+    async def _http(self) -> aiohttp.ClientSession:
+        """获取HTTP会话（需在事件循环中创建，因此延迟到首次请求）"""
+        if self._session is None or self._session.closed:
+            # 连接数与并发工作数一致
+            self._session = create_aiohttp_session(limit=self.max_workers, limit_per_host=self.max_workers)
+            self._owns_session = True
+        return self._session
+    
+    async def _web3(self) -> AsyncWeb3:
+        """获取异步Web3实例（其HTTP请求复用本工具的aiohttp会话）"""
+        if not self._provider_session_ready:
+            await self.w3.provider.cache_async_session(await self._http())
+            self._provider_session_ready = True
+        return self.w3
     
-    async def capture_state_snapshot(self, contract_address: str, block_number: Optional[int] = None) -> StateSnapshot:
+    async def close(self):
+        """关闭自行创建的HTTP会话"""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._provider_session_ready = False
+    
+    async def capture_state_snapshot(self, contract_address: str, block_number: Optional[int] = None,
+                                     inputs_fixtures: Optional[Dict[str, List[List[Any]]]] = None) -> StateSnapshot:
         """
         捕获合约状态快照
         
         Args:
             contract_address: 合约地址
             block_number: 目标区块号（默认为latest）
+            inputs_fixtures: 有参数函数的调用参数，键为函数名，值为参数列表的列表（每组参数调用一次）
             
         Returns:
             状态快照
         """
         contract_address = to_checksum_address(contract_address)
+        w3 = await self._web3()
         
-        if block_number is None:
-            block_number = self.w3.eth.block_number
-        
-        # 获取区块时间戳
-        block = self.w3.eth.get_block(block_number)
+        # 区块（时间戳）和合约ABI相互独立，并发获取；未指定区块时直接取latest区块，同时得到区块号
+        block, abi = await asyncio.gather(
+            w3.eth.get_block("latest" if block_number is None else block_number),
+            self._get_contract_abi(contract_address)
+        )
+        block_number = block['number']
         timestamp = block['timestamp']
+        # 区块哈希唯一确定链上状态（不受重组影响），用作eth_call结果持久化缓存的键
+        block_hash = bytes(block['hash']) if block.get('hash') else None
         
-        # 获取合约ABI
-        abi = await self._get_contract_abi(contract_address)
         if not abi:
             raise ValueError(f"无法获取合约 {contract_address} 的ABI")
         
         # 分析ABI获取view函数
-        view_functions = self._extract_view_functions(abi)
+        view_functions = self._extract_view_functions(abi, (self.etherscan_base_url, contract_address.lower()))
         
         # 批量调用view函数
         state_data, failed_calls = await self._batch_call_view_functions(
-            contract_address, view_functions, block_number
+            contract_address, view_functions, block_number, inputs_fixtures, block_hash
         )
         
         return StateSnapshot(
@@ -121,6 +323,66 @@ class StateReaderTool:
         if not self.etherscan_api_key:
             return None
         
+        cache_key = (self.etherscan_base_url, contract_address.lower())
+        cached = _ABI_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # 已验证合约的ABI不会改变，进程重启后从磁盘缓存读取
+        cached = self._load_abi_from_disk(cache_key)
+        if cached is not None:
+            _ABI_CACHE.set(cache_key, cached)
+            return cached
+        
+        # 同一合约的并发查询只请求一次Etherscan
+        async def fetch() -> Optional[List[Dict]]:
+            return await _ABI_FLIGHT.run(cache_key, lambda: self._request_contract_abi(contract_address, cache_key))
+        
+        # 字节码相同的合约ABI相同：已取得同一字节码的ABI时直接复用，并发查询合并为一次Etherscan请求
+        code_key = await self._code_cache_key(contract_address)
+        if code_key is None:
+            return await fetch()
+        
+        abi = _ABI_BY_CODE_CACHE.get(code_key)
+        if abi is None:
+            abi = await _ABI_BY_CODE_FLIGHT.run(code_key, fetch)
+            if abi is None:
+                return None
+            _ABI_BY_CODE_CACHE.set(code_key, abi)
+        
+        _ABI_CACHE.set(cache_key, abi)
+        return abi
+    
+    async def _code_cache_key(self, contract_address: str) -> Optional[Tuple[str, bytes]]:
+        """
+        获取按字节码共享ABI所用的缓存键
+        
+        Args:
+            contract_address: 合约地址
+            
+        Returns:
+            (Etherscan API地址, 字节码摘要)，没有代码或查询失败时返回None
+        """
+        try:
+            code = bytes(await (await self._web3()).eth.get_code(contract_address))
+        except Exception:
+            return None
+        
+        if not code:
+            return None
+        return self.etherscan_base_url, hashlib.blake2b(code, digest_size=16).digest()
+    
+    async def _request_contract_abi(self, contract_address: str, cache_key: Tuple[str, str]) -> Optional[List[Dict]]:
+        """
+        请求Etherscan获取合约ABI并缓存成功的结果
+        
+        Args:
+            contract_address: 合约地址
+            cache_key: 缓存键
+            
+        Returns:
+            合约ABI
+        """
         try:
             params = {
                 "module": "contract",
@@ -129,31 +391,71 @@ class StateReaderTool:
                 "apikey": self.etherscan_api_key
             }
             
-            response = requests.get(self.etherscan_base_url, params=params, timeout=10)
-            data = response.json()
+            session = await self._http()
+            for attempt in range(_ETHERSCAN_RETRIES):
+                async with self._rate_limiter, session.get(self.etherscan_base_url, params=params,
+                                                           timeout=aiohttp.ClientTimeout(total=10)) as response:
+                    data = loads_json(await response.read())
+                
+                # 触发频率限制时退避后重试
+                if data.get("message") == "NOTOK" and "rate limit" in str(data.get("result", "")).lower():
+                    await asyncio.sleep(_ETHERSCAN_BACKOFF * 2 ** attempt)
+                    continue
+                break
             
-            if data["status"] == "1" and data["result"]:
+            if data.get("status") == "1" and data["result"]:
                 result = data["result"][0]
                 abi_str = result.get("ABI", "")
                 
                 if abi_str and abi_str != "Contract source code not verified":
-                    return json.loads(abi_str)
+                    abi = loads_json(abi_str)
+                    _ABI_CACHE.set(cache_key, abi)
+                    self._save_abi_to_disk(cache_key, abi_str)
+                    return abi
         
         except Exception as e:
             print(f"获取ABI失败: {e}")
         
         return None
     
-    def _extract_view_functions(self, abi: List[Dict]) -> List[ViewFunction]:
+    def _load_abi_from_disk(self, cache_key: Tuple[str, str]) -> Optional[List[Dict]]:
+        """从持久化缓存读取合约ABI"""
+        if self._disk_cache is None:
+            return None
+        
+        try:
+            value = self._disk_cache.get("abi|" + "|".join(cache_key))
+            return loads_json(value) if value is not None else None
+        except Exception as e:
+            print(f"读取ABI缓存失败: {e}")
+            return None
+    
+    def _save_abi_to_disk(self, cache_key: Tuple[str, str], abi_str: str):
+        """将Etherscan返回的ABI原文写入持久化缓存"""
+        if self._disk_cache is None:
+            return
+        
+        try:
+            self._disk_cache.set("abi|" + "|".join(cache_key), abi_str.encode('utf-8'))
+        except Exception as e:
+            print(f"写入ABI缓存失败: {e}")
+    
+    def _extract_view_functions(self, abi: List[Dict], cache_key: Tuple[str, str]) -> List[ViewFunction]:
         """
         从ABI中提取view函数
         
         Args:
             abi: 合约ABI
+            cache_key: ABI的缓存键 (Etherscan API地址, 小写合约地址)
             
         Returns:
             视图函数列表
         """
+        # ABI对象来自 _ABI_CACHE，同一对象的解析结果不变，按对象身份判断是否命中
+        cached = _VIEW_FUNCTIONS_CACHE.get(cache_key)
+        if cached is not None and cached[0] is abi:
+            return list(cached[1])
+        
         view_functions = []
         
         for item in abi:
@@ -161,9 +463,10 @@ class StateReaderTool:
                 item.get("stateMutability") in ["view", "pure"] and
                 not item.get("name", "").startswith("_")):  # 跳过私有函数
                 
-                # 计算函数签名和选择器
-                signature = self._build_function_signature(item)
-                selector = Web3.keccak(text=signature)[:4].hex()
+                # 计算函数签名和选择器（tuple参数展开为组件类型，与本地编码一致；按名称和参数类型缓存）
+                param_types = tuple(_abi_type_string(input_param) for input_param in item.get("inputs", []))
+                signature = _build_function_signature(item["name"], param_types)
+                selector = _selector_for(signature)
                 
                 view_function = ViewFunction(
                     name=item["name"],
@@ -175,28 +478,12 @@ class StateReaderTool:
                 
                 view_functions.append(view_function)
         
+        _VIEW_FUNCTIONS_CACHE.set(cache_key, (abi, tuple(view_functions)))
         return view_functions
     
-    def _build_function_signature(self, func_abi: Dict) -> str:
-        """
-        构建函数签名
-        
-        Args:
-            func_abi: 函数ABI
-            
-        Returns:
-            函数签名字符串
-        """
-        name = func_abi["name"]
-        inputs = func_abi.get("inputs", [])
-        
-        param_types = []
-        for input_param in inputs:
-            param_types.append(input_param["type"])
-        
-        return f"{name}({','.join(param_types)})"
-    
-    async def _batch_call_view_functions(self, contract_address: str, view_functions: List[ViewFunction], block_number: int) -> Tuple[Dict[str, Any], List[str]]:
+    async def _batch_call_view_functions(self, contract_address: str, view_functions: List[ViewFunction], block_number: int,
+                                         inputs_fixtures: Optional[Dict[str, List[List[Any]]]] = None,
+                                         block_hash: Optional[bytes] = None) -> Tuple[Dict[str, Any], List[str]]:
         """
         批量调用view函数
         
@@ -204,6 +491,8 @@ class StateReaderTool:
             contract_address: 合约地址
             view_functions: 视图函数列表
             block_number: 目标区块号
+            inputs_fixtures: 有参数函数的调用参数（键为函数名）
+            block_hash: 目标区块哈希（用于持久化缓存调用结果）
             
         Returns:
             (状态数据, 失败的调用列表)
@@ -211,53 +500,77 @@ class StateReaderTool:
         state_data = {}
         failed_calls = []
         
-        # 创建合约实例
-        try:
-            # 构建基本ABI用于调用
-            abi = []
-            for func in view_functions:
-                abi.append({
-                    "type": "function",
-                    "name": func.name,
-                    "inputs": func.inputs,
-                    "outputs": func.outputs,
-                    "stateMutability": "view"
-                })
-            
-            contract = self.w3.eth.contract(
-                address=contract_address,
-                abi=abi
-            )
-        except Exception as e:
-            print(f"创建合约实例失败: {e}")
-            return state_data, [f.name for f in view_functions]
+        # 确定每个函数的调用参数：优先使用提供的参数，否则尝试默认值，无法生成或默认参数无意义时跳过
+        calls = []
+        for func in view_functions:
+            if not func.inputs:
+                calls.append((func, []))
+                continue
+            
+            fixtures = inputs_fixtures.get(func.name) if inputs_fixtures else None
+            if fixtures:
+                calls.extend((func, list(inputs)) for inputs in fixtures)
+                continue
+            
+            if self._skip_param_re is not None and self._skip_param_re.fullmatch(func.name):
+                failed_calls.append(f"{func.name} (需要参数)")
+                continue
+            
+            default_inputs = self._generate_default_inputs(func.inputs)
+            if default_inputs is not None:
+                calls.append((func, default_inputs))
+            else:
+                failed_calls.append(f"{func.name} (需要参数)")
+        
+        # 在本地编码调用数据（每个调用只编码一次，批量请求和逐个调用共用）
+        calldata = [self._encode_calldata(func, inputs) for func, inputs in calls]
+        
+        # 所有调用合并为JSON-RPC批量请求，未能批量取得结果的再逐个调用
+        batch_results = await self._batch_call_functions(contract_address, calls, calldata, block_number, block_hash)
+        
+        # 回放模式下缓存中没有的调用不再逐个发送
+        replay = self.call_cache_mode == "replay" and block_hash is not None
+        if replay:
+            failed_calls.extend(f"{func.name} (未缓存)" for i, (func, _) in enumerate(calls) if i not in batch_results)
+        
+        # 只有存在无法在本地编码的调用时才创建合约实例（交给web3编码）
+        contract = None
+        unencoded = [i for i, data in enumerate(calldata) if data is None]
+        if unencoded and not replay:
+            try:
+                contract = await self._get_contract(contract_address, view_functions)
+            except Exception as e:
+                print(f"创建合约实例失败: {e}")
+                failed_calls.extend(calls[i][0].name for i in unencoded)
         
         # 准备批量调用任务
         call_tasks = []
         
-        for func in view_functions:
-            # 对于无参数的函数，直接调用
-            if not func.inputs:
-                task = self._call_view_function(contract, func.name, [], block_number)
-                call_tasks.append((func.name, [], task))
-            else:
-                # 对于有参数的函数，尝试使用默认值或跳过
-                default_inputs = self._generate_default_inputs(func.inputs)
-                if default_inputs is not None:
-                    task = self._call_view_function(contract, func.name, default_inputs, block_number)
-                    call_tasks.append((func.name, default_inputs, task))
-                else:
-                    failed_calls.append(f"{func.name} (需要参数)")
+        for i, (func, inputs) in enumerate(calls):
+            if i in batch_results:
+                call_tasks.append((func.name, inputs, batch_results[i]))
+            elif replay:
+                continue
+            elif calldata[i] is not None:
+                task = self._call_encoded(contract_address, func, calldata[i], block_number)
+                call_tasks.append((func.name, inputs, task))
+            elif contract is not None:
+                task = self._call_view_function(contract, func.name, inputs, block_number)
+                call_tasks.append((func.name, inputs, task))
         
-        # 执行批量调用
-        results = await asyncio.gather(*[task for _, _, task in call_tasks], return_exceptions=True)
+        # 执行剩余的逐个调用
+        results = [task for _, _, task in call_tasks]
+        pending = [i for i, task in enumerate(results) if asyncio.iscoroutine(task)]
+        pending_results = await asyncio.gather(*[results[i] for i in pending], return_exceptions=True)
+        for i, result in zip(pending, pending_results):
+            results[i] = result
         
         # 处理结果
         for i, result in enumerate(results):
             func_name, inputs, _ = call_tasks[i]
             
             if isinstance(result, Exception):
-                failed_calls.append(f"{func_name}: {str(result)}")
+                failed_calls.append(f"{func_name}: {type(result).__name__}: {result}")
             else:
                 # 格式化结果
                 formatted_result = self._format_call_result(result, view_functions, func_name)
@@ -271,31 +584,449 @@ class StateReaderTool:
         
         return state_data, failed_calls
     
-    async def _call_view_function(self, contract: Contract, function_name: str, inputs: List[Any], block_number: int) -> Any:
+    async def _batch_call_functions(self, contract_address: str, calls: List[Tuple[ViewFunction, List[Any]]],
+                                    calldata: List[Optional[str]], block_number: int,
+                                    block_hash: Optional[bytes] = None) -> Dict[int, Any]:
         """
-        调用单个view函数
+        通过JSON-RPC批量请求调用view函数
         
         Args:
-            contract: 合约实例
-            function_name: 函数名
-            inputs: 输入参数
-            block_number: 区块号
+            contract_address: 合约地址
+            calls: (视图函数, 调用参数) 列表
+            calldata: 每个调用在本地编码的调用数据（无法编码时为None）
+            block_number: 目标区块号
+            block_hash: 目标区块哈希（用于持久化缓存调用结果）
+            
+        Returns:
+            调用在calls中的下标到解码结果（调用失败时为异常对象）的映射；
+            未包含的调用需要逐个发送
+        """
+        indices = [i for i, data in enumerate(calldata) if data is not None]
+        if not indices:
+            return {}
+        
+        # 优先通过Multicall3合并为少量eth_call，链上没有Multicall3或调用失败的部分再逐个放入批量请求
+        batch_calldata = [calldata[i] for i in indices]
+        responses = await self._multicall(contract_address, batch_calldata, block_number, block_hash)
+        missing = [j for j, response in enumerate(responses) if response is None]
+        if missing:
+            fallback = await self._batch_eth_call(contract_address, [batch_calldata[j] for j in missing],
+                                                  block_number, block_hash)
+            for j, response in zip(missing, fallback):
+                responses[j] = response
+        
+        results = {}
+        for index, response in zip(indices, responses):
+            if response is None:
+                continue
+            
+            if "error" in response:
+                results[index] = ValueError(response["error"].get("message", response["error"]))
+                continue
+            
+            try:
+                results[index] = self._decode_call_output(calls[index][0], bytes.fromhex(response["result"][2:]))
+            except Exception as e:
+                results[index] = e
+        
+        return results
+    
+    def _encode_calldata(self, func: ViewFunction, inputs: List[Any]) -> Optional[str]:
+        """
+        在本地编码调用数据（选择器 + ABI编码的参数）
+        
+        Args:
+            func: 视图函数
+            inputs: 调用参数
+            
+        Returns:
+            十六进制调用数据，参数无法在本地编码时返回None
+        """
+        selector = func.selector[2:] if func.selector.startswith("0x") else func.selector
+        try:
+            encoded = self._encode_call_args(func.inputs, inputs) if inputs else b""
+        except Exception:
+            return None
+        return "0x" + selector + encoded.hex()
+    
+    @staticmethod
+    def _decode_call_output(func: ViewFunction, data: bytes) -> Any:
+        """
+        解码eth_call返回数据（单个返回值直接返回，多个返回值返回列表；地址转换为校验和格式）
+        
+        Args:
+            func: 视图函数
+            data: 返回数据
+            
+        Returns:
+            解码结果
+        """
+        output_types = [_abi_type_string(output) for output in func.outputs]
+        decoded = [_normalize_addresses(value, output) for value, output in zip(abi_decode(output_types, data), func.outputs)]
+        return decoded[0] if len(decoded) == 1 else decoded
+    
+    @staticmethod
+    def _encode_call_args(input_params: List[Dict[str, Any]], inputs: List[Any]) -> bytes:
+        """
+        ABI编码调用参数（十六进制字符串形式的bytes参数先转换为字节）
+        
+        Args:
+            input_params: ABI中的输入参数定义
+            inputs: 参数值
+            
+        Returns:
+            编码后的参数数据
+        """
+        types = [_abi_type_string(param) for param in input_params]
+        values = [
+            bytes.fromhex(value[2:]) if abi_type.startswith("bytes") and isinstance(value, str) else value
+            for abi_type, value in zip(types, inputs)
+        ]
+        return abi_encode(types, values)
+    
+    async def _multicall(self, contract_address: str, calldata: List[str], block_number: int,
+                         block_hash: Optional[bytes] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        通过Multicall3的aggregate3执行对同一合约的多个调用
+        
+        调用按 _MULTICALL_CHUNK_SIZE 分块，各块合并为一个批量请求发送；
+        整块执行出错（如超出gas或响应大小上限）时二分重试，直到定位到出错的单个调用。
+        
+        Args:
+            contract_address: 合约地址
+            calldata: 每个调用的输入数据
+            block_number: 目标区块号
+            block_hash: 目标区块哈希（用于持久化缓存调用结果）
             
         Returns:
-            函数调用结果
+            与calldata一一对应的响应对象（格式同 _batch_eth_call）；
+            该区块上没有Multicall3或aggregate3调用失败时对应位置为None
+        """
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(calldata)
+        pending = [(i, min(i + _MULTICALL_CHUNK_SIZE, len(calldata))) for i in range(0, len(calldata), _MULTICALL_CHUNK_SIZE)]
+        
+        while pending:
+            payloads = [self._encode_aggregate3(contract_address, calldata[start:end]) for start, end in pending]
+            aggregate_responses = await self._batch_eth_call(_MULTICALL3_ADDRESS, payloads, block_number, block_hash)
+            
+            retry = []
+            for (start, end), response in zip(pending, aggregate_responses):
+                if response is not None and "error" in response and end - start > 1:
+                    mid = (start + end) // 2
+                    retry.extend([(start, mid), (mid, end)])
+                    continue
+                
+                results = self._decode_aggregate3(response, end - start)
+                if results is not None:
+                    responses[start:end] = results
+            
+            pending = retry
+        
+        return responses
+    
+    @staticmethod
+    def _encode_aggregate3(contract_address: str, calldata: List[str]) -> str:
+        """
+        编码aggregate3调用数据（允许单个调用失败）
+        
+        Args:
+            contract_address: 合约地址
+            calldata: 每个调用的输入数据
+            
+        Returns:
+            十六进制调用数据
+        """
+        encoded = abi_encode(["(address,bool,bytes)[]"],
+                             [[(contract_address, True, bytes.fromhex(data[2:])) for data in calldata]])
+        return "0x" + _AGGREGATE3_SELECTOR + encoded.hex()
+    
+    @classmethod
+    def _decode_aggregate3(cls, response: Optional[Dict[str, Any]], count: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        解码aggregate3的响应，转换为每个调用的响应对象
+        
+        Args:
+            response: aggregate3调用的响应对象
+            count: 包含的调用数
+            
+        Returns:
+            每个调用的响应对象；响应缺失、调用出错或该区块上没有Multicall3（返回空数据）时返回None
         """
         try:
-            func = getattr(contract.functions, function_name)
+            results = abi_decode(["(bool,bytes)[]"], bytes.fromhex(response["result"][2:]))[0]
+        except Exception:
+            return None
+        
+        if len(results) != count:
+            return None
+        
+        return [
+            {"result": "0x" + return_data.hex()} if success
+            else {"error": {"message": cls._revert_message(return_data), "data": "0x" + return_data.hex()}}
+            for success, return_data in results
+        ]
+    
+    @staticmethod
+    def _revert_message(return_data: bytes) -> str:
+        """
+        从回滚数据中解析错误信息（与节点对单个eth_call返回的格式一致）
+        
+        Args:
+            return_data: 回滚数据
             
-            if inputs:
-                result = func(*inputs).call(block_identifier=block_number)
+        Returns:
+            错误信息，如 "execution reverted: Ownable: caller is not the owner"
+        """
+        try:
+            if return_data[:4] == _ERROR_STRING_SELECTOR:
+                return f"execution reverted: {abi_decode(['string'], return_data[4:])[0]}"
+            if return_data[:4] == _PANIC_SELECTOR:
+                return f"execution reverted: panic code {hex(abi_decode(['uint256'], return_data[4:])[0])}"
+        except Exception:
+            pass
+        
+        if return_data:
+            return f"execution reverted: 0x{return_data.hex()}"
+        return "execution reverted"
+    
+    async def _batch_eth_call(self, contract_address: str, calldata: List[str], block_number: int,
+                              block_hash: Optional[bytes] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        将多个eth_call合并为JSON-RPC批量请求发送（按 _RPC_BATCH_SIZE 分块）
+        
+        已缓存（内存或持久化缓存）的调用不再发送；其他协程正在请求的相同调用直接等待其结果。
+        
+        Args:
+            contract_address: 合约地址
+            calldata: 每个调用的输入数据
+            block_number: 目标区块号
+            block_hash: 目标区块哈希（提供时按区块哈希持久化缓存调用结果）
+            
+        Returns:
+            与calldata一一对应的响应对象（含result或error）；
+            节点不支持批量请求或响应缺失时对应位置为None
+        """
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(calldata)
+        
+        use_disk = block_hash is not None and self.call_cache_mode != "disabled"
+        if not use_disk and not self.web3_provider.startswith(("http://", "https://")):
+            return responses
+        
+        cache_keys = [(self.web3_provider, contract_address, data, block_number) for data in calldata]
+        disk_keys = [self._call_disk_key(contract_address, block_hash, data) for data in calldata] if use_disk else None
+        misses = []
+        waiting = []
+        for i, cache_key in enumerate(cache_keys):
+            responses[i] = _ETH_CALL_CACHE.get(cache_key)
+            if responses[i] is not None:
+                continue
+            if use_disk:
+                responses[i] = self._load_call_from_disk(disk_keys[i])
+                if responses[i] is not None:
+                    _ETH_CALL_CACHE.set(cache_key, responses[i])
+                    continue
+            inflight = _ETH_CALL_INFLIGHT.get(cache_key)
+            if inflight is not None:
+                waiting.append((i, inflight))
             else:
-                result = func().call(block_identifier=block_number)
+                misses.append(i)
+        
+        # 回放模式只使用缓存的结果
+        if self.call_cache_mode == "replay" and use_disk:
+            misses = []
+        if not self.web3_provider.startswith(("http://", "https://")):
+            misses = []
+        
+        if misses:
+            # 登记本协程负责发送的调用，相同的并发调用会等待这些Future
+            loop = asyncio.get_running_loop()
+            owned = {i: loop.create_future() for i in misses}
+            for i, future in owned.items():
+                _ETH_CALL_INFLIGHT[cache_keys[i]] = future
             
-            return result
+            try:
+                await self._send_eth_call_batches(contract_address, calldata, misses, block_number, responses, cache_keys)
+                if use_disk and self.call_cache_mode == "enabled":
+                    self._save_calls_to_disk([(disk_keys[i], responses[i]) for i in misses])
+            finally:
+                for i, future in owned.items():
+                    if _ETH_CALL_INFLIGHT.get(cache_keys[i]) is future:
+                        del _ETH_CALL_INFLIGHT[cache_keys[i]]
+                    if not future.done():
+                        future.set_result(responses[i])
         
+        for i, future in waiting:
+            responses[i] = await asyncio.shield(future)
+        
+        return responses
+    
+    @staticmethod
+    def _call_disk_key(contract_address: str, block_hash: bytes, data: str) -> str:
+        """
+        获取eth_call结果持久化缓存的键（合约地址、区块哈希和调用数据的摘要）
+        
+        Args:
+            contract_address: 合约地址
+            block_hash: 区块哈希
+            data: 调用数据
+            
+        Returns:
+            缓存键
+        """
+        digest = hashlib.blake2b(
+            bytes.fromhex(contract_address[2:]) + block_hash + bytes.fromhex(data[2:]), digest_size=16
+        ).hexdigest()
+        return "call|" + digest
+    
+    def _load_call_from_disk(self, disk_key: str) -> Optional[Dict[str, Any]]:
+        """
+        从持久化缓存读取eth_call结果
+        
+        Args:
+            disk_key: 缓存键
+            
+        Returns:
+            响应对象（只含result），未命中时返回None
+        """
+        try:
+            value = self._disk_cache.get(disk_key)
         except Exception as e:
-            raise Exception(f"调用 {function_name} 失败: {str(e)}")
+            print(f"读取调用缓存失败: {e}")
+            return None
+        return {"result": "0x" + value.hex()} if value is not None else None
+    
+    def _save_calls_to_disk(self, entries: List[Tuple[str, Optional[Dict[str, Any]]]]):
+        """
+        将成功的eth_call结果在一个事务中写入持久化缓存
+        
+        Args:
+            entries: (缓存键, 响应对象) 列表
+        """
+        try:
+            self._disk_cache.set_many([
+                (disk_key, bytes.fromhex(response["result"][2:]))
+                for disk_key, response in entries
+                if response is not None and "result" in response
+            ])
+        except Exception as e:
+            print(f"写入调用缓存失败: {e}")
+    
+    async def _send_eth_call_batches(self, contract_address: str, calldata: List[str], indices: List[int],
+                                     block_number: int, responses: List[Optional[Dict[str, Any]]],
+                                     cache_keys: List[Tuple]):
+        """
+        发送JSON-RPC批量请求，将响应按请求id写入responses并缓存成功的结果
+        
+        Args:
+            contract_address: 合约地址
+            calldata: 每个调用的输入数据
+            indices: 需要发送的调用在calldata中的下标
+            block_number: 目标区块号
+            responses: 响应列表（原地写入）
+            cache_keys: 每个调用的缓存键
+        """
+        session = await self._http()
+        block = hex(block_number)
+        
+        for offset in range(0, len(indices), _RPC_BATCH_SIZE):
+            payload = [
+                {
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "method": "eth_call",
+                    "params": [{"to": contract_address, "data": calldata[i]}, block]
+                }
+                for i in indices[offset:offset + _RPC_BATCH_SIZE]
+            ]
+            
+            try:
+                async with session.post(self.web3_provider, json=payload,
+                                        timeout=aiohttp.ClientTimeout(total=30)) as response:
+                    body = loads_json(await response.read())
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                continue
+            
+            # 不支持批量请求的节点会返回单个错误对象
+            if not isinstance(body, list):
+                break
+            
+            for item in body:
+                request_id = item.get("id") if isinstance(item, dict) else None
+                if isinstance(request_id, int) and 0 <= request_id < len(calldata):
+                    responses[request_id] = item
+                    if "result" in item:
+                        _ETH_CALL_CACHE.set(cache_keys[request_id], item)
+    
+    async def _get_contract(self, contract_address: str, view_functions: List[ViewFunction]) -> AsyncContract:
+        """
+        获取用于逐个调用view函数的合约实例（按地址和函数签名缓存）
+        
+        Args:
+            contract_address: 合约地址
+            view_functions: 视图函数列表
+            
+        Returns:
+            合约实例
+        """
+        cache_key = (contract_address, hash(tuple((f.name, f.signature) for f in view_functions)))
+        contract = self._contract_cache.get(cache_key)
+        if contract is not None:
+            return contract
+        
+        # 构建基本ABI用于调用
+        abi = []
+        for func in view_functions:
+            abi.append({
+                "type": "function",
+                "name": func.name,
+                "inputs": func.inputs,
+                "outputs": func.outputs,
+                "stateMutability": "view"
+            })
+        
+        contract = (await self._web3()).eth.contract(
+            address=contract_address,
+            abi=abi
+        )
+        self._contract_cache.set(cache_key, contract)
+        return contract
+    
+    async def _call_encoded(self, contract_address: str, func: ViewFunction, calldata: str, block_number: int) -> Any:
+        """
+        使用预先编码的调用数据发送单个eth_call
+        
+        Args:
+            contract_address: 合约地址
+            func: 视图函数
+            calldata: 十六进制调用数据
+            block_number: 区块号
+            
+        Returns:
+            函数调用结果（调用失败时异常直接抛出，由调用方记录）
+        """
+        w3 = await self._web3()
+        async with self._call_semaphore:
+            data = await w3.eth.call({"to": contract_address, "data": calldata}, block_identifier=block_number)
+        
+        return self._decode_call_output(func, bytes(data))
+    
+    async def _call_view_function(self, contract: AsyncContract, function_name: str, inputs: List[Any], block_number: int) -> Any:
+        """
+        调用单个view函数
+        
+        Args:
+            contract: 合约实例
+            function_name: 函数名
+            inputs: 输入参数
+            block_number: 区块号
+            
+        Returns:
+            函数调用结果（调用失败时异常直接抛出，由调用方记录）
+        """
+        func = getattr(contract.functions, function_name)
+        
+        async with self._call_semaphore:
+            return await func(*inputs).call(block_identifier=block_number)
     
     def _generate_default_inputs(self, inputs: List[Dict[str, Any]]) -> Optional[List[Any]]:
         """
@@ -330,27 +1061,15 @@ class StateReaderTool:
         Returns:
             默认值
         """
-        if param_type == "address":
-            return "0x0000000000000000000000000000000000000000"
-        elif param_type.startswith("uint"):
+        default_value = _TYPE_DEFAULTS.get(param_type, _MISSING)
+        if default_value is not _MISSING:
+            return default_value
+        if _INT_TYPE_RE.match(param_type):
             return 0
-        elif param_type.startswith("int"):
-            return 0
-        elif param_type == "bool":
-            return False
-        elif param_type == "bytes32":
-            return "0x0000000000000000000000000000000000000000000000000000000000000000"
-        elif param_type == "string":
-            return ""
-        elif param_type == "bytes":
-            return b""
-        elif param_type.endswith("[]"):
+        if param_type.endswith("[]"):
             return []
-        elif "[" in param_type and "]" in param_type:
-            # 固定长度数组，暂时不支持
-            return None
-        else:
-            return None
+        # 固定长度数组等其他类型，暂时不支持
+        return None
     
     def _format_call_result(self, result: Any, view_functions: List[ViewFunction], function_name: str) -> Any:
         """
@@ -460,26 +1179,28 @@ class StateReaderTool:
             "removed_functions": []
         }
         
-        # 比较共同的函数
-        common_functions = set(snapshot1.state_data.keys()) & set(snapshot2.state_data.keys())
+        # 直接使用字典的键视图做集合运算，不重复构建集合
+        state1 = snapshot1.state_data
+        state2 = snapshot2.state_data
+        keys1 = state1.keys()
+        keys2 = state2.keys()
         
-        for func_name in common_functions:
-            value1 = snapshot1.state_data[func_name]
-            value2 = snapshot2.state_data[func_name]
+        # 比较共同的函数（同一对象直接视为未变化，跳过深度比较）
+        for func_name in keys1 & keys2:
+            value1 = state1[func_name]
+            value2 = state2[func_name]
             
-            if value1 != value2:
+            if value1 is not value2 and value1 != value2:
                 comparison["changes"][func_name] = {
                     "old_value": value1,
                     "new_value": value2
                 }
         
         # 新增的函数
-        new_functions = set(snapshot2.state_data.keys()) - set(snapshot1.state_data.keys())
-        comparison["new_functions"] = list(new_functions)
+        comparison["new_functions"] = list(keys2 - keys1)
         
         # 移除的函数
-        removed_functions = set(snapshot1.state_data.keys()) - set(snapshot2.state_data.keys())
-        comparison["removed_functions"] = list(removed_functions)
+        comparison["removed_functions"] = list(keys1 - keys2)
         
         return comparison
     
@@ -491,10 +1212,7 @@ class StateReaderTool:
             snapshot: 状态快照
             file_path: 文件路径
         """
-        snapshot_dict = asdict(snapshot)
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(snapshot_dict, f, indent=2, ensure_ascii=False, default=str)
+        write_json(file_path, snapshot)
     
     def import_snapshot_from_json(self, file_path: str) -> StateSnapshot:
         """
@@ -506,8 +1224,8 @@ class StateReaderTool:
         Returns:
             状态快照
         """
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(file_path, 'rb') as f:
+            data = loads_json(f.read())
         
         # 重构ViewFunction对象
         view_functions = []
@@ -534,12 +1252,14 @@ class StateReaderTool:
         Returns:
             地址到快照的映射
         """
-        tasks = []
-        for address in contract_addresses:
-            task = self.capture_state_snapshot(address, block_number)
-            tasks.append(task)
+        # 限制同时捕获的合约数
+        semaphore = asyncio.Semaphore(max(1, self.max_workers))
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        async def capture(address: str) -> StateSnapshot:
+            async with semaphore:
+                return await self.capture_state_snapshot(address, block_number)
+        
+        results = await asyncio.gather(*(capture(address) for address in contract_addresses), return_exceptions=True)
         
         snapshots = {}
         for i, result in enumerate(results):
@@ -560,28 +1280,31 @@ async def main():
         etherscan_api_key="YOUR_ETHERSCAN_API_KEY"
     )
     
-    # 捕获单个合约状态快照
-    contract_address = "0xA0b86a33E6441E09e5fDE7f80b0138b43A5A9b27"
-    snapshot = await tool.capture_state_snapshot(contract_address)
-    
-    print(f"合约: {snapshot.contract_address}")
-    print(f"区块: {snapshot.block_number}")
-    print(f"时间戳: {snapshot.timestamp}")
-    print(f"成功调用: {len(snapshot.state_data)} 个函数")
-    print(f"失败调用: {len(snapshot.failed_calls)} 个函数")
-    
-    # 导出快照
-    tool.export_snapshot_to_json(snapshot, "contract_snapshot.json")
-    
-    # 批量捕获多个合约
-    contracts = [
-        "0xA0b86a33E6441E09e5fDE7f80b0138b43A5A9b27",
-        "0x1f9840a85d5aF5bf1D1762F925BDADdC4201F984"
-    ]
-    snapshots = await tool.batch_capture_multiple_contracts(contracts)
-    
-    for addr, snap in snapshots.items():
-        print(f"\n{addr}: {len(snap.state_data)} 个函数")
+    try:
+        # 捕获单个合约状态快照
+        contract_address = "0xA0b86a33E6441E09e5fDE7f80b0138b43A5A9b27"
+        snapshot = await tool.capture_state_snapshot(contract_address)
+        
+        print(f"合约: {snapshot.contract_address}")
+        print(f"区块: {snapshot.block_number}")
+        print(f"时间戳: {snapshot.timestamp}")
+        print(f"成功调用: {len(snapshot.state_data)} 个函数")
+        print(f"失败调用: {len(snapshot.failed_calls)} 个函数")
+        
+        # 导出快照
+        tool.export_snapshot_to_json(snapshot, "contract_snapshot.json")
+        
+        # 批量捕获多个合约
+        contracts = [
+            "0xA0b86a33E6441E09e5fDE7f80b0138b43A5A9b27",
+            "0x1f9840a85d5aF5bf1D1762F925BDADdC4201F984"
+        ]
+        snapshots = await tool.batch_capture_multiple_contracts(contracts)
+        
+        for addr, snap in snapshots.items():
+            print(f"\n{addr}: {len(snap.state_data)} 个函数")
+    finally:
+        await tool.close()
 
 
 if __name__ == "__main__":
@@ -6,25 +6,63 @@ Code Sanitizer Tool
 使代理能够专注于分析可执行逻辑，避免潜在误导性文档的危险。
 """
 
+import os
 import re
+import sys
 import json
-from typing import Dict, List, Optional, Set, Tuple, Any
-from dataclasses import dataclass
+import mmap
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_left
+from functools import cached_property, lru_cache
+from typing import Dict, List, Optional, Set, Tuple, Any, Union
+from dataclasses import dataclass, field
 from pathlib import Path
 import ast
 # 可选依赖 - 如果需要高级功能请安装
+# solcx和slither导入开销大（crytic-compile、web3等），在首次分析时才按需导入
 try:
-    import solcx
-    HAS_SOLCX = True
+    import hyperscan
+    HAS_HYPERSCAN = True
 except ImportError:
-    HAS_SOLCX = False
+    HAS_HYPERSCAN = False
 
-try:
-    from slither import Slither
-    from slither.core.declarations import Contract, Function
-    HAS_SLITHER = True
-except ImportError:
-    HAS_SLITHER = False
+
+# 重要注释模式：NatSpec、许可证、编译指令、待办/警告/安全/审计标记
+_ESSENTIAL_PATTERNS = (
+    r'@dev\s+', r'@param\s+', r'@return\s+', r'@notice\s+', r'SPDX-License-Identifier', r'pragma\s+',
+    r'TODO', r'FIXME', r'WARNING', r'SECURITY', r'@audit',
+)
+_ESSENTIAL_RE = re.compile('|'.join(_ESSENTIAL_PATTERNS), re.IGNORECASE)
+_IMPORT_RE = re.compile(r'import\s+["\']([^"\']+)["\']')
+_FUNC_DEF_RE = re.compile(r'function\s+(\w+)\s*\(')
+_VAR_DEF_RE = re.compile(r'(?:uint256|uint|int|address|bool|bytes32|string)\s+(\w+)')
+_IDENT_RE = re.compile(r'\b[A-Za-z_]\w*\b')
+
+# 词法扫描：整行注释（连同缩进和换行）、行注释、块注释（允许未闭合至文件末尾）、字符串字面量
+_TOKEN_PATTERN = (
+    r'^[ \t]*//[^\n]*\n?|//[^\n]*|/\*.*?(?:\*/|\Z)|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\''
+)
+_TOKEN_RE = re.compile(_TOKEN_PATTERN, re.DOTALL | re.MULTILINE)
+# 括号匹配扫描：花括号、分号，以及需要整体跳过的注释和字符串
+_BRACE_SCAN_RE = re.compile(r'[{};]|' + _TOKEN_PATTERN, re.DOTALL | re.MULTILINE)
+_DECL_END_RE = re.compile(r'\s*;')
+_TRAILING_WS_RE = re.compile(r'[^\S\n]+(?=\n|\Z)')
+_BLANK_RUN_RE = re.compile(r'\A\n+\Z|\A\n{2,}|\n{2,}\Z|\n{3,}')
+_NON_ASCII_RE = re.compile(r'[^\x00-\x7f]')
+_NON_NEWLINE_RE = re.compile(r'[^\n]')
+_IMPORT_LINE_RE = re.compile(r'^[ \t]*import\b[^\n]*\n?', re.MULTILINE)
+
+# 调试语句模式
+_DEBUG_PATTERNS = (
+    r'console\.log\([^)]*\);\s*',
+    r'console\.error\([^)]*\);\s*',
+    r'console\.warn\([^)]*\);\s*',
+    r'require\(false,\s*[^)]*\);\s*',  # 调试用的require
+    r'assert\(false[^)]*\);\s*',  # 调试用的assert
+)
+_DEBUG_RE = re.compile('|'.join(_DEBUG_PATTERNS), re.MULTILINE)
 
 
 @dataclass
@@ -32,11 +70,45 @@ class SanitizedCode:
     """清理后的代码"""
     original_code: str
     sanitized_code: str
-    removed_comments: List[str]
+    removed_comments: Dict[str, int]  # 注释文本 -> 出现次数，相同注释只保存一份
     removed_functions: List[str]
     removed_imports: List[str]
     removed_variables: List[str]
-    optimization_summary: Dict[str, int]
+    original_size: int = field(init=False)
+    sanitized_size: int = field(init=False)
+    
+    def __post_init__(self):
+        self.original_size = len(self.original_code)
+        self.sanitized_size = len(self.sanitized_code)
+    
+    @cached_property
+    def removed_comment_count(self) -> int:
+        """移除的注释总数"""
+        return sum(self.removed_comments.values())
+    
+    @cached_property
+    def size_reduction(self) -> int:
+        """减少的字符数"""
+        return self.original_size - self.sanitized_size
+    
+    @cached_property
+    def size_reduction_percent(self) -> float:
+        """减少的百分比"""
+        if not self.original_size:
+            return 0.0
+        return round(self.size_reduction / self.original_size * 100, 2)
+    
+    @property
+    def optimization_summary(self) -> Dict[str, Any]:
+        """优化摘要（兼容旧接口，按需构造）"""
+        return {
+            "removed_comments": self.removed_comment_count,
+            "removed_functions": len(self.removed_functions),
+            "removed_imports": len(self.removed_imports),
+            "removed_variables": len(self.removed_variables),
+            "size_reduction": self.size_reduction,
+            "size_reduction_percent": self.size_reduction_percent
+        }
 
 
 @dataclass
@@ -49,6 +121,148 @@ class CodeAnalysis:
     used_functions: Set[str]
     used_variables: Set[str]
     dependencies: Set[str]
+    # Slither或solc AST死代码分析给出的 (名称, 起始, 结束) 字符区间；为None时退回正则查找
+    dead_functions: Optional[List[Tuple[str, int, int]]] = None
+    dead_variables: Optional[List[Tuple[str, int, int]]] = None
+
+
+@lru_cache(maxsize=64)
+def _scan_comments(source_code: str) -> Tuple[Tuple[int, int, str], ...]:
+    """
+    对源码做一次词法扫描，返回全部注释的 (起始, 结束, 文本)
+    
+    字符串字面量被整体跳过，其中的 // 和 /* 不会被当作注释。同一份源码的
+    分析、注释提取和注释移除共享同一次扫描结果。
+    
+    Args:
+        source_code: 源代码
+        
+    Returns:
+        按出现顺序排列的注释元组
+    """
+    comments = []
+    for match in _TOKEN_RE.finditer(source_code):
+        token = match.group(0)
+        if token.lstrip().startswith('/'):
+            comments.append((match.start(), match.end(), token))
+    return tuple(comments)
+
+
+@lru_cache(maxsize=None)
+def _load_solcx():
+    """按需导入solcx，不可用时返回None"""
+    try:
+        import solcx
+    except ImportError:
+        return None
+    return solcx
+
+
+@lru_cache(maxsize=None)
+def _load_slither():
+    """
+    按需导入Slither
+    
+    Returns:
+        (Slither类, 调用类IR操作类型元组)，不可用时返回None
+    """
+    try:
+        from slither import Slither
+        from slither.slithir.operations import InternalCall, HighLevelCall
+    except ImportError:
+        return None
+    return Slither, (InternalCall, HighLevelCall)
+
+
+@lru_cache(maxsize=None)
+def _get_hyperscan_db(name: str):
+    """
+    编译多模式Hyperscan数据库（按名称缓存，每个进程只编译一次）
+    
+    Args:
+        name: 'essential' 或 'debug'
+        
+    Returns:
+        Hyperscan数据库
+    """
+    if name == 'essential':
+        patterns, flags = _ESSENTIAL_PATTERNS, hyperscan.HS_FLAG_CASELESS
+    else:
+        patterns, flags = _DEBUG_PATTERNS, hyperscan.HS_FLAG_MULTILINE
+    
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    db.compile(
+        expressions=[pattern.encode('utf-8') for pattern in patterns],
+        ids=list(range(len(patterns))),
+        elements=len(patterns),
+        flags=[flags | hyperscan.HS_FLAG_SINGLEMATCH] * len(patterns)
+    )
+    return db
+
+
+def _hyperscan_matches(name: str, text: str) -> bool:
+    """用Hyperscan一次扫描判断文本是否匹配任一模式"""
+    matched = []
+    
+    def on_match(pattern_id, start, end, flags, context):
+        matched.append(pattern_id)
+    
+    _get_hyperscan_db(name).scan(text.encode('utf-8'), match_event_handler=on_match)
+    return bool(matched)
+
+
+@lru_cache(maxsize=4096)
+def _match_essential_comment(comment: str) -> bool:
+    """判断注释是否匹配重要注释模式（按注释内容缓存）"""
+    if HAS_HYPERSCAN:
+        return _hyperscan_matches('essential', comment)
+    return bool(_ESSENTIAL_RE.search(comment))
+
+
+def _byte_span_converter(source_code: str):
+    """
+    构造把UTF-8字节区间转换为字符区间的函数（编译器给出的源码位置为字节偏移）
+    
+    Args:
+        source_code: 源代码
+        
+    Returns:
+        (字节起始, 字节长度) -> (字符起始, 字符结束) 的转换函数
+    """
+    if source_code.isascii():
+        return lambda start, length: (start, start + length)
+    
+    # 记录每个非ASCII字符的字节起始位置，以及截至该字符为止多占的字节数
+    byte_starts = []
+    extra_bytes = [0]
+    for match in _NON_ASCII_RE.finditer(source_code):
+        byte_starts.append(match.start() + extra_bytes[-1])
+        extra_bytes.append(extra_bytes[-1] + len(match.group(0).encode('utf-8')) - 1)
+    
+    def to_char(offset: int) -> int:
+        return offset - extra_bytes[bisect_left(byte_starts, offset)]
+    
+    def convert(start: int, length: int) -> Tuple[int, int]:
+        return to_char(start), to_char(start + length)
+    
+    return convert
+
+
+def _declaration_end(source_code: str, end: int) -> int:
+    """变量声明的源码位置不含结尾分号，需要时向后扩展到分号之后"""
+    semicolon = _DECL_END_RE.match(source_code, end)
+    return semicolon.end() if semicolon else end
+
+
+def _collapse_blank_run(match) -> str:
+    """连续换行的替换内容：整段为空时清空，首尾处保留一个换行，中间保留一个空行"""
+    at_start = match.start() == 0
+    at_end = match.end() == len(match.string)
+    if at_start and at_end:
+        return ''
+    if at_start or at_end:
+        return '\n'
+    return '\n\n'
 
 
 class CodeSanitizerTool:
@@ -65,59 +279,63 @@ class CodeSanitizerTool:
             'continue', 'return', 'require', 'assert', 'revert', 'emit', 'new',
             'delete', 'try', 'catch', 'assembly', 'storage', 'memory', 'calldata'
         }
+        
+        # 以源码sha256为键的分析缓存
+        self._analysis_cache: Dict[str, CodeAnalysis] = {}
+        self._slither_cache: Dict[str, Any] = {}
+        self._solc_ast_cache: Dict[str, Dict[str, Any]] = {}
+    
+    def clear_cache(self):
+        """清空分析缓存"""
+        self._analysis_cache.clear()
+        self._slither_cache.clear()
+        self._solc_ast_cache.clear()
+        _scan_comments.cache_clear()
+        _match_essential_comment.cache_clear()
     
-    def sanitize_solidity_code(self, source_code: str, keep_essential_comments: bool = True) -> SanitizedCode:
+    def sanitize_solidity_code(self, source_code: Union[str, bytes], keep_essential_comments: bool = True) -> SanitizedCode:
         """
         清理Solidity源代码
         
+        各清理规则只在源码上标记待移除的区间，最后一次性拼接保留的片段，
+        避免每个步骤都重写整份源码。
+        
         Args:
-            source_code: 原始源代码
+            source_code: 原始源代码（bytes按UTF-8解码一次）
             keep_essential_comments: 是否保留重要注释（如NatSpec）
             
         Returns:
             清理后的代码对象
         """
+        if isinstance(source_code, bytes):
+            source_code = source_code.decode('utf-8')
+        
         # 分析代码结构
         analysis = self._analyze_solidity_code(source_code)
         
-        # 执行清理步骤
-        sanitized = source_code
-        removed_comments = []
-        removed_functions = []
-        removed_imports = []
-        removed_variables = []
+        # 1. 注释区间；code_view 为将被移除的注释替换成空格后的源码，偏移与原文一致
+        comment_spans, removed_comments, code_view = self._find_comments(source_code, keep_essential_comments)
         
-        # 1. 移除注释
-        sanitized, comments = self._remove_comments(sanitized, keep_essential_comments)
-        removed_comments.extend(comments)
+        # 2. 未使用的导入
+        import_spans, removed_imports = self._find_unused_imports(code_view, analysis)
         
-        # 2. 移除未使用的导入
-        sanitized, imports = self._remove_unused_imports(sanitized, analysis)
-        removed_imports.extend(imports)
+        # 3. 未使用的函数
+        function_spans, removed_functions = self._find_unused_functions(code_view, analysis)
         
-        # 3. 移除未使用的函数
-        sanitized, functions = self._remove_unused_functions(sanitized, analysis)
-        removed_functions.extend(functions)
+        # 4. 未使用的变量
+        variable_spans, removed_variables = self._find_unused_variables(code_view, analysis)
         
-        # 4. 移除未使用的变量
-        sanitized, variables = self._remove_unused_variables(sanitized, analysis)
-        removed_variables.extend(variables)
+        # 5. 调试代码
+        debug_spans = self._find_debug_code(code_view)
         
-        # 5. 清理空行和多余空格
-        sanitized = self._clean_whitespace(sanitized)
+        # 一次性拼接保留片段
+        sanitized = self._apply_removals(
+            source_code,
+            comment_spans + import_spans + function_spans + variable_spans + debug_spans
+        )
         
-        # 6. 移除调试代码
-        sanitized = self._remove_debug_code(sanitized)
-        
-        # 生成优化摘要
-        optimization_summary = {
-            "removed_comments": len(removed_comments),
-            "removed_functions": len(removed_functions),
-            "removed_imports": len(removed_imports),
-            "removed_variables": len(removed_variables),
-            "size_reduction": len(source_code) - len(sanitized),
-            "size_reduction_percent": round((len(source_code) - len(sanitized)) / len(source_code) * 100, 2)
-        }
+        # 6. 清理空行和多余空格
+        sanitized = self._clean_whitespace(sanitized)
         
         return SanitizedCode(
             original_code=source_code,
@@ -125,152 +343,475 @@ class CodeSanitizerTool:
             removed_comments=removed_comments,
             removed_functions=removed_functions,
             removed_imports=removed_imports,
-            removed_variables=removed_variables,
-            optimization_summary=optimization_summary
+            removed_variables=removed_variables
         )
     
+    def _apply_removals(self, code: str, spans: List[Tuple[int, int]]) -> str:
+        """
+        按区间移除代码片段
+        
+        只按偏移切片拼接一次，与片段文本无关，源码中重复出现的相同片段
+        不会被误删。
+        
+        Args:
+            code: 源代码
+            spans: 待移除的 (start, end) 区间列表，可重叠
+            
+        Returns:
+            移除后的代码
+        """
+        if not spans:
+            return code
+        
+        parts = []
+        last = 0
+        for start, end in sorted(spans):
+            if start > last:
+                parts.append(code[last:start])
+            last = max(last, end)
+        parts.append(code[last:])
+        
+        return ''.join(parts)
+    
     def _analyze_solidity_code(self, source_code: str) -> CodeAnalysis:
         """
         分析Solidity代码结构
         
+        优先使用Slither/SlithIR做一次完整编译分析；Slither不可用或编译失败时
+        使用solc一次编译得到的AST；两者都不可用时退回到基于正则的逐行分析。
+        
         Args:
             source_code: 源代码
             
+        Returns:
+            代码分析结果
+        """
+        source_hash = hashlib.sha256(source_code.encode('utf-8')).hexdigest()
+        cached = self._analysis_cache.get(source_hash)
+        if cached is not None:
+            return cached
+        
+        analysis = None
+        if _load_slither() is not None:
+            try:
+                analysis = self._analyze_with_slither(source_code, source_hash)
+            except Exception:
+                analysis = None
+        
+        if analysis is None and _load_solcx() is not None:
+            try:
+                analysis = self._analyze_with_solc_ast(source_code, source_hash)
+            except Exception:
+                analysis = None
+        
+        if analysis is None:
+            analysis = self._analyze_with_regex(source_code)
+        
+        self._analysis_cache[source_hash] = analysis
+        return analysis
+    
+    def _get_slither(self, source_code: str, source_hash: str):
+        """
+        获取源码对应的Slither对象（按源码哈希缓存）
+        
+        Args:
+            source_code: 源代码
+            source_hash: 源代码sha256
+            
+        Returns:
+            Slither对象
+        """
+        slither = self._slither_cache.get(source_hash)
+        if slither is not None:
+            return slither
+        
+        # Slither需要从文件编译，写入临时文件
+        with tempfile.NamedTemporaryFile('w', suffix='.sol', encoding='utf-8', delete=False) as f:
+            f.write(source_code)
+            tmp_path = f.name
+        
+        try:
+            slither_cls, _ = _load_slither()
+            slither = slither_cls(tmp_path)
+        finally:
+            os.unlink(tmp_path)
+        
+        self._slither_cache[source_hash] = slither
+        return slither
+    
+    def _analyze_with_slither(self, source_code: str, source_hash: str) -> CodeAnalysis:
+        """
+        通过单次Slither编译分析代码结构
+        
+        Args:
+            source_code: 源代码
+            source_hash: 源代码sha256
+            
         Returns:
             代码分析结果
         """
         functions = set()
         variables = set()
         imports = set()
-        comments = []
         used_functions = set()
         used_variables = set()
         dependencies = set()
         
-        lines = source_code.split('\n')
+        slither = self._get_slither(source_code, source_hash)
+        _, call_types = _load_slither()
+        called_functions = set()
+        accessed_variables = set()
+        
+        for compilation_unit in slither.compilation_units:
+            for import_directive in compilation_unit.import_directives:
+                imports.add(str(import_directive.filename))
+        
+        for contract in slither.contracts:
+            for variable in contract.state_variables_declared:
+                variables.add(variable.name)
+            
+            # 继承和库调用视为依赖
+            for parent in contract.inheritance:
+                dependencies.add(parent.name)
+            for library_call in contract.all_library_calls:
+                library = library_call[0] if isinstance(library_call, tuple) else library_call.destination
+                dependencies.add(library.name)
+            
+            called_functions.update(contract.all_functions_called)
+            
+            for function in contract.functions_and_modifiers_declared:
+                functions.add(function.name)
+                accessed_variables.update(function.state_variables_read)
+                accessed_variables.update(function.state_variables_written)
+                
+                for variable in function.local_variables:
+                    if variable.name:
+                        variables.add(variable.name)
+                
+                for variable in function.variables_read:
+                    if variable is not None and variable.name:
+                        used_variables.add(variable.name)
+                
+                for node in function.nodes:
+                    for ir in node.irs:
+                        if isinstance(ir, call_types) and ir.function is not None:
+                            used_functions.add(ir.function.name)
+                            called_functions.add(ir.function)
+        
+        dead_functions, dead_variables = self._collect_dead_code(
+            slither, source_code, called_functions, accessed_variables
+        )
+        
+        return CodeAnalysis(
+            functions=functions,
+            variables=variables,
+            imports=imports,
+            comments=self._extract_comments(source_code),
+            used_functions=used_functions,
+            used_variables=used_variables,
+            dependencies=dependencies,
+            dead_functions=dead_functions,
+            dead_variables=dead_variables
+        )
+    
+    def _collect_dead_code(self, slither, source_code: str, called_functions: Set[Any],
+                           accessed_variables: Set[Any]) -> Tuple[List[Tuple[str, int, int]], List[Tuple[str, int, int]]]:
+        """
+        根据Slither的调用图和读写集合收集死代码的源码区间
+        
+        未被任何函数调用的私有/内部函数，以及未被任何函数读写的非public
+        状态变量视为死代码。只处理当前源码文件中的声明。
         
-        for line in lines:
-            line = line.strip()
+        Args:
+            slither: Slither对象
+            source_code: 源代码
+            called_functions: 被调用过的函数对象
+            accessed_variables: 被读写过的状态变量对象
             
-            # 提取注释
-            if line.startswith('//') or line.startswith('/*') or '*/' in line:
-                comments.append(line)
+        Returns:
+            (死函数区间列表, 死变量区间列表)
+        """
+        own_files = {name for name, text in slither.source_code.items() if text == source_code}
+        to_char_span = _byte_span_converter(source_code)
+        
+        def char_span(source_mapping) -> Optional[Tuple[int, int]]:
+            if source_mapping.filename.absolute not in own_files:
+                return None
+            return to_char_span(source_mapping.start, source_mapping.length)
+        
+        dead_functions = []
+        dead_variables = []
+        
+        for contract in slither.contracts:
+            for function in contract.functions_and_modifiers_declared:
+                if (function in called_functions
+                        or function.visibility not in ('private', 'internal')
+                        or not function.is_implemented
+                        or self._is_special_function(function.name)):
+                    continue
+                span = char_span(function.source_mapping)
+                if span:
+                    dead_functions.append((function.name, *span))
+            
+            for variable in contract.state_variables_declared:
+                if variable in accessed_variables or variable.visibility == 'public':
+                    continue
+                span = char_span(variable.source_mapping)
+                if span:
+                    dead_variables.append((variable.name, span[0], _declaration_end(source_code, span[1])))
+        
+        return dead_functions, dead_variables
+    
+    def _get_solc_ast(self, source_code: str, source_hash: str) -> Dict[str, Any]:
+        """
+        获取源码的solc AST（按源码哈希缓存，每份源码只编译一次）
+        
+        Args:
+            source_code: 源代码
+            source_hash: 源代码sha256
+            
+        Returns:
+            SourceUnit AST
+        """
+        source_ast = self._solc_ast_cache.get(source_hash)
+        if source_ast is not None:
+            return source_ast
+        
+        solc_output = _load_solcx().compile_source(source_code, output_values=['ast'])
+        source_ast = next(iter(solc_output.values()))['ast']
+        
+        self._solc_ast_cache[source_hash] = source_ast
+        return source_ast
+    
+    def _analyze_with_solc_ast(self, source_code: str, source_hash: str) -> CodeAnalysis:
+        """
+        通过solc AST分析代码结构
+        
+        AST中的引用关系（referencedDeclaration）给出准确的使用情况，
+        各声明节点的 src（"起始:长度:文件"）给出死代码的精确区间。
+        
+        Args:
+            source_code: 源代码
+            source_hash: 源代码sha256
             
-            # 提取导入
-            if line.startswith('import'):
-                match = re.search(r'import\s+["\']([^"\']+)["\']', line)
-                if match:
-                    imports.add(match.group(1))
+        Returns:
+            代码分析结果
+        """
+        functions = set()
+        variables = set()
+        imports = set()
+        dependencies = set()
+        
+        function_nodes = []
+        state_variable_nodes = []
+        declaration_names = {}
+        referenced_ids = set()
+        
+        source_ast = self._get_solc_ast(source_code, source_hash)
+        
+        stack = [source_ast]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+                continue
+            if not isinstance(node, dict):
+                continue
             
-            # 提取函数定义
-            func_match = re.search(r'function\s+(\w+)\s*\(', line)
-            if func_match:
-                functions.add(func_match.group(1))
+            node_type = node.get('nodeType')
+            if node_type == 'ImportDirective':
+                imports.add(node.get('file', ''))
+            elif node_type == 'ContractDefinition':
+                for base in node.get('baseContracts', []):
+                    dependencies.add(base['baseName'].get('name') or base['baseName'].get('namePath', ''))
+            elif node_type == 'UsingForDirective' and node.get('libraryName'):
+                library = node['libraryName']
+                dependencies.add(library.get('name') or library.get('namePath', ''))
+            elif node_type in ('FunctionDefinition', 'ModifierDefinition'):
+                if node.get('name'):
+                    functions.add(node['name'])
+                    declaration_names[node['id']] = node['name']
+                    function_nodes.append(node)
+            elif node_type == 'VariableDeclaration':
+                if node.get('name'):
+                    variables.add(node['name'])
+                    declaration_names[node['id']] = node['name']
+                    if node.get('stateVariable'):
+                        state_variable_nodes.append(node)
             
-            # 提取变量定义
-            var_matches = re.findall(r'(?:uint256|uint|int|address|bool|bytes32|string)\s+(\w+)', line)
-            for var in var_matches:
-                if var not in self.solidity_keywords:
-                    variables.add(var)
+            referenced = node.get('referencedDeclaration')
+            if isinstance(referenced, int):
+                referenced_ids.add(referenced)
             
-            # 查找函数调用
-            call_matches = re.findall(r'(\w+)\s*\(', line)
-            for call in call_matches:
-                if call in functions:
-                    used_functions.add(call)
+            for value in node.values():
+                if isinstance(value, (dict, list)):
+                    stack.append(value)
+        
+        used_names = {declaration_names[i] for i in referenced_ids if i in declaration_names}
+        to_char_span = _byte_span_converter(source_code)
+        
+        def char_span(node) -> Tuple[int, int]:
+            start, length, _ = node['src'].split(':')
+            return to_char_span(int(start), int(length))
+        
+        dead_functions = []
+        for node in function_nodes:
+            if (node['id'] in referenced_ids
+                    or node.get('visibility') not in ('private', 'internal')
+                    or not node.get('implemented', True)
+                    or self._is_special_function(node['name'])):
+                continue
+            dead_functions.append((node['name'], *char_span(node)))
+        
+        dead_variables = []
+        for node in state_variable_nodes:
+            if node['id'] in referenced_ids or node.get('visibility') == 'public':
+                continue
+            start, end = char_span(node)
+            dead_variables.append((node['name'], start, _declaration_end(source_code, end)))
+        
+        return CodeAnalysis(
+            functions=functions,
+            variables=variables,
+            imports=imports,
+            comments=self._extract_comments(source_code),
+            used_functions=functions & used_names,
+            used_variables=variables & used_names,
+            dependencies=dependencies,
+            dead_functions=dead_functions,
+            dead_variables=dead_variables
+        )
+    
+    def _analyze_with_regex(self, source_code: str) -> CodeAnalysis:
+        """
+        基于正则的代码结构分析（Slither不可用时的备用方法）
+        
+        先收集全部定义，再扫描一遍标识符统计使用情况，这样在定义之前出现的
+        调用也能被识别；定义处本身不计为使用。注释不参与分析。
+        
+        Args:
+            source_code: 源代码
             
-            # 查找变量使用
-            for var in variables:
-                if var in line and not line.strip().startswith('//'):
-                    used_variables.add(var)
+        Returns:
+            代码分析结果
+        """
+        functions = set()
+        variables = set()
+        imports = set()
+        used_functions = set()
+        used_variables = set()
+        dependencies = set()
+        
+        _, _, code_view = self._find_comments_strip_all(source_code)
+        
+        # 提取导入
+        for line_match in _IMPORT_LINE_RE.finditer(code_view):
+            match = _IMPORT_RE.search(line_match.group(0))
+            if match:
+                imports.add(match.group(1))
+        
+        # 第一遍：提取函数和变量定义，记录定义处标识符的位置
+        definition_starts = set()
+        for match in _FUNC_DEF_RE.finditer(code_view):
+            functions.add(match.group(1))
+            definition_starts.add(match.start(1))
+        
+        for match in _VAR_DEF_RE.finditer(code_view):
+            var = match.group(1)
+            if var not in self.solidity_keywords:
+                variables.add(var)
+                definition_starts.add(match.start(1))
+        
+        # 第二遍：查找函数和变量的使用
+        for match in _IDENT_RE.finditer(code_view):
+            if match.start() in definition_starts:
+                continue
+            ident = match.group(0)
+            if ident in functions:
+                used_functions.add(ident)
+            elif ident in variables:
+                used_variables.add(ident)
         
         return CodeAnalysis(
             functions=functions,
             variables=variables,
             imports=imports,
-            comments=comments,
+            comments=self._extract_comments(source_code),
             used_functions=used_functions,
             used_variables=used_variables,
             dependencies=dependencies
         )
     
-    def _remove_comments(self, code: str, keep_essential: bool = True) -> Tuple[str, List[str]]:
+    def _extract_comments(self, source_code: str) -> List[str]:
         """
-        移除注释
+        提取注释
+        
+        Args:
+            source_code: 源代码
+            
+        Returns:
+            注释列表
+        """
+        return [token.strip() for _, _, token in _scan_comments(source_code)]
+    
+    def _find_comments(self, code: str, keep_essential: bool = True) -> Tuple[List[Tuple[int, int]], Dict[str, int], str]:
+        """
+        查找待移除的注释
+        
+        通过一次词法扫描识别注释，字符串字面量中的 // 和 /* 不会被当作注释。
+        按是否保留重要注释选择专用的扫描循环，避免在每个注释上重复判断。
         
         Args:
             code: 源代码
             keep_essential: 是否保留重要注释
             
         Returns:
-            (清理后的代码, 移除的注释列表)
-        """
-        removed_comments = []
-        lines = code.split('\n')
-        cleaned_lines = []
-        in_block_comment = False
-        
-        for line in lines:
-            original_line = line
-            
-            # 处理块注释
-            if '/*' in line and '*/' in line:
-                # 单行块注释
-                comment_start = line.find('/*')
-                comment_end = line.find('*/') + 2
-                comment = line[comment_start:comment_end]
-                
-                # 检查是否为重要注释
-                if keep_essential and self._is_essential_comment(comment):
-                    cleaned_lines.append(line)
-                else:
-                    removed_comments.append(comment)
-                    line = line[:comment_start] + line[comment_end:]
-                    cleaned_lines.append(line)
-            elif '/*' in line:
-                # 块注释开始
-                in_block_comment = True
-                comment_start = line.find('/*')
-                comment = line[comment_start:]
-                removed_comments.append(comment)
-                line = line[:comment_start]
-                cleaned_lines.append(line)
-            elif '*/' in line and in_block_comment:
-                # 块注释结束
-                in_block_comment = False
-                comment_end = line.find('*/') + 2
-                comment = line[:comment_end]
-                removed_comments.append(comment)
-                line = line[comment_end:]
-                cleaned_lines.append(line)
-            elif in_block_comment:
-                # 在块注释中
-                removed_comments.append(line)
+            (注释区间列表, 移除的注释及次数, 注释替换为空格后的代码视图)
+        """
+        if keep_essential:
+            return self._find_comments_keep_essential(code)
+        return self._find_comments_strip_all(code)
+    
+    def _find_comments_keep_essential(self, code: str) -> Tuple[List[Tuple[int, int]], Dict[str, int], str]:
+        """查找除重要注释以外的所有注释"""
+        spans = []
+        removed_comments = {}
+        view_parts = []
+        last = 0
+        
+        for start, end, token in _scan_comments(code):
+            if _match_essential_comment(token):
                 continue
-            elif line.strip().startswith('//'):
-                # 单行注释
-                if keep_essential and self._is_essential_comment(line):
-                    cleaned_lines.append(line)
-                else:
-                    removed_comments.append(line.strip())
-                    # 如果行内有代码，只移除注释部分
-                    comment_start = line.find('//')
-                    if comment_start > 0 and line[:comment_start].strip():
-                        cleaned_lines.append(line[:comment_start].rstrip())
-            else:
-                # 处理行内注释
-                comment_pos = line.find('//')
-                if comment_pos > 0:
-                    comment = line[comment_pos:]
-                    if keep_essential and self._is_essential_comment(comment):
-                        cleaned_lines.append(line)
-                    else:
-                        removed_comments.append(comment)
-                        cleaned_lines.append(line[:comment_pos].rstrip())
-                else:
-                    cleaned_lines.append(line)
-        
-        return '\n'.join(cleaned_lines), removed_comments
+            
+            spans.append((start, end))
+            comment = sys.intern(token.strip())
+            removed_comments[comment] = removed_comments.get(comment, 0) + 1
+            view_parts.append(code[last:start])
+            view_parts.append(_NON_NEWLINE_RE.sub(' ', token))
+            last = end
+        
+        view_parts.append(code[last:])
+        
+        return spans, removed_comments, ''.join(view_parts)
+    
+    def _find_comments_strip_all(self, code: str) -> Tuple[List[Tuple[int, int]], Dict[str, int], str]:
+        """查找所有注释（不做重要注释判断）"""
+        spans = []
+        removed_comments = {}
+        view_parts = []
+        last = 0
+        
+        for start, end, token in _scan_comments(code):
+            spans.append((start, end))
+            comment = sys.intern(token.strip())
+            removed_comments[comment] = removed_comments.get(comment, 0) + 1
+            view_parts.append(code[last:start])
+            view_parts.append(_NON_NEWLINE_RE.sub(' ', token))
+            last = end
+        
+        view_parts.append(code[last:])
+        
+        return spans, removed_comments, ''.join(view_parts)
     
     def _is_essential_comment(self, comment: str) -> bool:
         """
@@ -282,119 +823,138 @@ class CodeSanitizerTool:
         Returns:
             是否为重要注释
         """
-        essential_patterns = [
-            r'@dev\s+',  # NatSpec开发者注释
-            r'@param\s+',  # NatSpec参数注释
-            r'@return\s+',  # NatSpec返回值注释
-            r'@notice\s+',  # NatSpec用户注释
-            r'SPDX-License-Identifier',  # 许可证标识
-            r'pragma\s+',  # 编译指令
-            r'TODO',  # 待办事项
-            r'FIXME',  # 修复标记
-            r'WARNING',  # 警告
-            r'SECURITY',  # 安全注释
-            r'@audit',  # 审计标记
-        ]
-        
-        for pattern in essential_patterns:
-            if re.search(pattern, comment, re.IGNORECASE):
-                return True
-        
-        return False
+        return _match_essential_comment(comment)
     
-    def _remove_unused_imports(self, code: str, analysis: CodeAnalysis) -> Tuple[str, List[str]]:
+    def _find_unused_imports(self, code: str, analysis: CodeAnalysis) -> Tuple[List[Tuple[int, int]], List[str]]:
         """
-        移除未使用的导入
+        查找未使用的导入
         
         Args:
-            code: 源代码
+            code: 代码视图
             analysis: 代码分析结果
             
         Returns:
-            (清理后的代码, 移除的导入列表)
+            (导入行区间列表, 移除的导入列表)
         """
+        spans = []
         removed_imports = []
-        lines = code.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            if line.strip().startswith('import'):
-                # 检查导入是否被使用
-                import_match = re.search(r'import\s+["\']([^"\']+)["\']', line)
-                if import_match:
-                    import_path = import_match.group(1)
-                    
-                    # 简单的使用检查（可以扩展为更复杂的分析）
-                    import_name = Path(import_path).stem
-                    if self._is_import_used(code, import_name, import_path):
-                        cleaned_lines.append(line)
-                    else:
-                        removed_imports.append(line.strip())
-                else:
-                    cleaned_lines.append(line)
-            else:
-                cleaned_lines.append(line)
         
-        return '\n'.join(cleaned_lines), removed_imports
+        import_lines = list(_IMPORT_LINE_RE.finditer(code))
+        if not import_lines:
+            return spans, removed_imports
+        
+        # 导入行以外出现的标识符（库名引用、using声明、继承、类型等），每个文件只扫描一次
+        identifiers = set(_IDENT_RE.findall(_IMPORT_LINE_RE.sub('', code)))
+        
+        for line_match in import_lines:
+            line = line_match.group(0)
+            # 检查导入是否被使用
+            import_match = _IMPORT_RE.search(line)
+            if not import_match:
+                continue
+            
+            import_path = import_match.group(1)
+            
+            # 简单的使用检查（可以扩展为更复杂的分析）
+            import_name = Path(import_path).stem
+            if not self._is_import_used(identifiers, import_name):
+                spans.append(line_match.span())
+                removed_imports.append(sys.intern(line.strip()))
+        
+        return spans, removed_imports
     
-    def _is_import_used(self, code: str, import_name: str, import_path: str) -> bool:
+    def _is_import_used(self, identifiers: Set[str], import_name: str) -> bool:
         """
         检查导入是否被使用
         
         Args:
-            code: 源代码
+            identifiers: 导入行以外代码中出现的标识符集合
             import_name: 导入名称
-            import_path: 导入路径
             
         Returns:
             是否被使用
         """
-        # 检查是否有对导入库的引用
-        patterns = [
-            rf'\b{import_name}\.',  # 直接使用库名
-            rf'using\s+{import_name}',  # using声明
-            rf'import.*{import_name}',  # 其他导入形式
-        ]
-        
-        for pattern in patterns:
-            if re.search(pattern, code):
-                return True
-        
-        return False
+        return import_name in identifiers
     
-    def _remove_unused_functions(self, code: str, analysis: CodeAnalysis) -> Tuple[str, List[str]]:
+    def _find_unused_functions(self, code: str, analysis: CodeAnalysis) -> Tuple[List[Tuple[int, int]], List[str]]:
         """
-        移除未使用的函数
+        查找未使用的函数
+        
+        有Slither死代码分析结果时直接使用其源码区间；否则一次遍历所有函数定义，
+        对候选函数用括号匹配确定完整函数体。
         
         Args:
-            code: 源代码
+            code: 代码视图
             analysis: 代码分析结果
             
         Returns:
-            (清理后的代码, 移除的函数列表)
+            (函数区间列表, 移除的函数列表)
         """
+        spans = []
         removed_functions = []
         
-        # 识别未使用的私有/内部函数
-        unused_functions = analysis.functions - analysis.used_functions
+        if analysis.dead_functions is not None:
+            for func_name, start, end in analysis.dead_functions:
+                spans.append((start, end))
+                removed_functions.append(sys.intern(f"function {func_name}"))
+            return spans, removed_functions
         
-        # 过滤掉公共函数和特殊函数
-        truly_unused = set()
-        for func in unused_functions:
-            if not self._is_special_function(func) and self._is_private_or_internal_function(code, func):
-                truly_unused.add(func)
+        # 识别未使用的函数，过滤掉特殊函数
+        candidates = {
+            func for func in analysis.functions - analysis.used_functions
+            if not self._is_special_function(func)
+        }
+        if not candidates:
+            return spans, removed_functions
         
-        # 移除未使用的函数
-        cleaned_code = code
-        for func_name in truly_unused:
-            func_pattern = rf'function\s+{func_name}\s*\([^{{]*\{{[^}}]*\}}'
-            matches = re.finditer(func_pattern, cleaned_code, re.DOTALL)
+        for match in _FUNC_DEF_RE.finditer(code):
+            func_name = match.group(1)
+            if func_name not in candidates:
+                continue
+            
+            body = self._match_function_body(code, match.end())
+            if body is None:
+                continue
             
-            for match in matches:
-                removed_functions.append(f"function {func_name}")
-                cleaned_code = cleaned_code.replace(match.group(0), '')
+            # 只移除私有/内部函数
+            body_start, body_end = body
+            if self._is_private_or_internal_function(code[match.start():body_start]):
+                spans.append((match.start(), body_end))
+                removed_functions.append(sys.intern(f"function {func_name}"))
         
-        return cleaned_code, removed_functions
+        return spans, removed_functions
+    
+    def _match_function_body(self, code: str, pos: int) -> Optional[Tuple[int, int]]:
+        """
+        从函数声明处查找匹配的函数体
+        
+        Args:
+            code: 代码视图
+            pos: 函数声明中参数列表的起始位置
+            
+        Returns:
+            (函数体起始 { 的位置, 匹配的 } 之后的位置)，无函数体或括号不匹配时返回None
+        """
+        depth = 0
+        body_start = None
+        
+        for match in _BRACE_SCAN_RE.finditer(code, pos):
+            token = match.group(0)
+            if token == '{':
+                if depth == 0:
+                    body_start = match.start()
+                depth += 1
+            elif token == '}':
+                depth -= 1
+                if depth == 0:
+                    return body_start, match.end()
+                if depth < 0:
+                    return None
+            elif token == ';' and depth == 0:
+                # 没有函数体的声明
+                return None
+        
+        return None
     
     def _is_special_function(self, func_name: str) -> bool:
         """
@@ -413,59 +973,53 @@ class CodeSanitizerTool:
         
         return func_name in special_functions or func_name.startswith('_')
     
-    def _is_private_or_internal_function(self, code: str, func_name: str) -> bool:
+    def _is_private_or_internal_function(self, declaration: str) -> bool:
         """
         检查函数是否为私有或内部函数
         
         Args:
-            code: 源代码
-            func_name: 函数名
+            declaration: 函数声明（函数体之前的部分）
             
         Returns:
             是否为私有或内部函数
         """
-        func_pattern = rf'function\s+{func_name}\s*\([^{{]*'
-        match = re.search(func_pattern, code)
-        
-        if match:
-            func_declaration = match.group(0)
-            return 'private' in func_declaration or 'internal' in func_declaration
-        
-        return False
+        return 'private' in declaration or 'internal' in declaration
     
-    def _remove_unused_variables(self, code: str, analysis: CodeAnalysis) -> Tuple[str, List[str]]:
+    def _find_unused_variables(self, code: str, analysis: CodeAnalysis) -> Tuple[List[Tuple[int, int]], List[str]]:
         """
-        移除未使用的变量
+        查找未使用的变量
         
         Args:
-            code: 源代码
+            code: 代码视图
             analysis: 代码分析结果
             
         Returns:
-            (清理后的代码, 移除的变量列表)
+            (变量声明区间列表, 移除的变量列表)
         """
+        spans = []
         removed_variables = []
+        
+        if analysis.dead_variables is not None:
+            for var_name, start, end in analysis.dead_variables:
+                spans.append((start, end))
+                removed_variables.append(sys.intern(var_name))
+            return spans, removed_variables
+        
         unused_variables = analysis.variables - analysis.used_variables
         
-        cleaned_code = code
-        for var_name in unused_variables:
-            # 移除未使用的局部变量声明
-            var_patterns = [
-                rf'uint256\s+{var_name}\s*;',
-                rf'uint\s+{var_name}\s*;',
-                rf'int\s+{var_name}\s*;',
-                rf'address\s+{var_name}\s*;',
-                rf'bool\s+{var_name}\s*;',
-                rf'bytes32\s+{var_name}\s*;',
-                rf'string\s+{var_name}\s*;'
-            ]
-            
-            for pattern in var_patterns:
-                if re.search(pattern, cleaned_code):
-                    cleaned_code = re.sub(pattern, '', cleaned_code)
-                    removed_variables.append(var_name)
-        
-        return cleaned_code, removed_variables
+        if not unused_variables:
+            return spans, removed_variables
+        
+        # 所有未使用变量名合并为一个交替模式，一次扫描即可
+        names = '|'.join(map(re.escape, sorted(unused_variables, key=len, reverse=True)))
+        pattern = re.compile(rf'\b(?:uint256|uint|int|address|bool|bytes32|string)\s+({names})\s*;')
+        
+        for match in pattern.finditer(code):
+            spans.append(match.span())
+            if match.group(1) not in removed_variables:
+                removed_variables.append(sys.intern(match.group(1)))
+        
+        return spans, removed_variables
     
     def _clean_whitespace(self, code: str) -> str:
         """
@@ -477,79 +1031,67 @@ class CodeSanitizerTool:
         Returns:
             清理后的代码
         """
-        lines = code.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            # 移除行尾空格
-            line = line.rstrip()
-            cleaned_lines.append(line)
+        # 移除行尾空格
+        code = _TRAILING_WS_RE.sub('', code)
         
-        # 移除多余的连续空行
-        final_lines = []
-        prev_empty = False
-        
-        for line in cleaned_lines:
-            if line.strip() == '':
-                if not prev_empty:
-                    final_lines.append(line)
-                prev_empty = True
-            else:
-                final_lines.append(line)
-                prev_empty = False
-        
-        return '\n'.join(final_lines)
+        # 连续空行合并为一行；开头和结尾的空行各只保留一个换行
+        return _BLANK_RUN_RE.sub(_collapse_blank_run, code)
     
-    def _remove_debug_code(self, code: str) -> str:
+    def _find_debug_code(self, code: str) -> List[Tuple[int, int]]:
         """
-        移除调试代码
+        查找调试代码
         
         Args:
-            code: 源代码
+            code: 代码视图
             
         Returns:
-            清理后的代码
+            调试语句区间列表
         """
-        # 移除console.log等调试语句
-        debug_patterns = [
-            r'console\.log\([^)]*\);\s*',
-            r'console\.error\([^)]*\);\s*',
-            r'console\.warn\([^)]*\);\s*',
-            r'require\(false,\s*[^)]*\);\s*',  # 调试用的require
-            r'assert\(false[^)]*\);\s*',  # 调试用的assert
-        ]
-        
-        cleaned_code = code
-        for pattern in debug_patterns:
-            cleaned_code = re.sub(pattern, '', cleaned_code, flags=re.MULTILINE)
+        # Hyperscan一次扫描预筛，大多数源码不含调试语句时无需再跑正则
+        if HAS_HYPERSCAN and not _hyperscan_matches('debug', code):
+            return []
         
-        return cleaned_code
+        # console.log等调试语句，所有模式合并为一次扫描
+        return [match.span() for match in _DEBUG_RE.finditer(code)]
     
-    def sanitize_multiple_files(self, file_paths: List[str]) -> Dict[str, SanitizedCode]:
+    def sanitize_multiple_files(self, file_paths: List[str], keep_essential_comments: bool = True,
+                                max_workers: Optional[int] = None) -> Dict[str, SanitizedCode]:
         """
         批量清理多个文件
         
+        各文件相互独立，多个文件时分发到进程池并行处理。
+        
         Args:
             file_paths: 文件路径列表
+            keep_essential_comments: 是否保留重要注释（如NatSpec）
+            max_workers: 最大进程数（默认为CPU核数）
             
         Returns:
             文件路径到清理结果的映射
         """
         results = {}
+        jobs = [(file_path, keep_essential_comments) for file_path in file_paths]
         
-        for file_path in file_paths:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    source_code = f.read()
-                
-                sanitized = self.sanitize_solidity_code(source_code)
-                results[file_path] = sanitized
-                
-            except Exception as e:
-                print(f"处理文件 {file_path} 时出错: {e}")
+        if len(jobs) <= 1 or max_workers == 1:
+            outcomes = (_sanitize_file(job, self) for job in jobs)
+            self._collect_sanitized(outcomes, results)
+            return results
+        
+        workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            self._collect_sanitized(executor.map(_sanitize_file, jobs, chunksize=chunksize), results)
         
         return results
     
+    def _collect_sanitized(self, outcomes, results: Dict[str, SanitizedCode]):
+        """汇总批量清理结果，出错的文件只打印错误"""
+        for file_path, sanitized, error in outcomes:
+            if error is None:
+                results[file_path] = sanitized
+            else:
+                print(f"处理文件 {file_path} 时出错: {error}")
+    
     def analyze_optimization_impact(self, sanitized: SanitizedCode) -> Dict[str, Any]:
         """
         分析优化影响
@@ -562,14 +1104,14 @@ class CodeSanitizerTool:
         """
         return {
             "size_reduction": {
-                "bytes": sanitized.optimization_summary["size_reduction"],
-                "percentage": sanitized.optimization_summary["size_reduction_percent"]
+                "bytes": sanitized.size_reduction,
+                "percentage": sanitized.size_reduction_percent
             },
             "removed_elements": {
-                "comments": sanitized.optimization_summary["removed_comments"],
-                "functions": sanitized.optimization_summary["removed_functions"],
-                "imports": sanitized.optimization_summary["removed_imports"],
-                "variables": sanitized.optimization_summary["removed_variables"]
+                "comments": sanitized.removed_comment_count,
+                "functions": len(sanitized.removed_functions),
+                "imports": len(sanitized.removed_imports),
+                "variables": len(sanitized.removed_variables)
             },
             "readability_impact": self._assess_readability_impact(sanitized),
             "maintainability_impact": self._assess_maintainability_impact(sanitized)
@@ -585,9 +1127,10 @@ class CodeSanitizerTool:
         Returns:
             可读性影响评估
         """
-        if sanitized.optimization_summary["removed_comments"] > 20:
+        removed_comments = sanitized.removed_comment_count
+        if removed_comments > 20:
             return "显著降低 - 移除了大量注释"
-        elif sanitized.optimization_summary["removed_comments"] > 5:
+        elif removed_comments > 5:
             return "轻微降低 - 移除了一些注释"
         else:
             return "基本无影响"
@@ -602,8 +1145,7 @@ class CodeSanitizerTool:
         Returns:
             可维护性影响评估
         """
-        total_removed = (sanitized.optimization_summary["removed_functions"] + 
-                        sanitized.optimization_summary["removed_variables"])
+        total_removed = len(sanitized.removed_functions) + len(sanitized.removed_variables)
         
         if total_removed > 10:
             return "积极影响 - 移除了大量无用代码"
@@ -628,17 +1170,17 @@ class CodeSanitizerTool:
         
         # 基本统计
         report_lines.append("基本统计:")
-        report_lines.append(f"  原始代码大小: {len(sanitized.original_code):,} 字节")
-        report_lines.append(f"  清理后大小: {len(sanitized.sanitized_code):,} 字节")
-        report_lines.append(f"  减少大小: {sanitized.optimization_summary['size_reduction']:,} 字节 ({sanitized.optimization_summary['size_reduction_percent']}%)")
+        report_lines.append(f"  原始代码大小: {sanitized.original_size:,} 字节")
+        report_lines.append(f"  清理后大小: {sanitized.sanitized_size:,} 字节")
+        report_lines.append(f"  减少大小: {sanitized.size_reduction:,} 字节 ({sanitized.size_reduction_percent}%)")
         report_lines.append("")
         
         # 移除的元素
         report_lines.append("移除的元素:")
-        report_lines.append(f"  注释: {sanitized.optimization_summary['removed_comments']} 个")
-        report_lines.append(f"  函数: {sanitized.optimization_summary['removed_functions']} 个")
-        report_lines.append(f"  导入: {sanitized.optimization_summary['removed_imports']} 个")
-        report_lines.append(f"  变量: {sanitized.optimization_summary['removed_variables']} 个")
+        report_lines.append(f"  注释: {sanitized.removed_comment_count} 个")
+        report_lines.append(f"  函数: {len(sanitized.removed_functions)} 个")
+        report_lines.append(f"  导入: {len(sanitized.removed_imports)} 个")
+        report_lines.append(f"  变量: {len(sanitized.removed_variables)} 个")
         report_lines.append("")
         
         # 详细列表
@@ -663,6 +1205,77 @@ class CodeSanitizerTool:
         return "\n".join(report_lines)
 
 
+def _read_source_file(file_path: str) -> str:
+    """
+    读取源文件
+    
+    通过只读内存映射直接解码，省去文件对象的中间缓冲；
+    换行符按文本模式的方式统一为LF。
+    
+    Args:
+        file_path: 文件路径
+        
+    Returns:
+        源代码文本
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # 空文件无法映射
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            source_code = str(mm, 'utf-8')
+    
+    if '\r' in source_code:
+        source_code = source_code.replace('\r\n', '\n').replace('\r', '\n')
+    return source_code
+
+
+# 工作进程内复用的清理工具实例（每个进程首次调用时创建）
+_PROCESS_SANITIZER: Optional[CodeSanitizerTool] = None
+
+
+def _process_sanitizer() -> CodeSanitizerTool:
+    """获取本进程共享的清理工具实例（进程内的所有任务复用其缓存）"""
+    global _PROCESS_SANITIZER
+    if _PROCESS_SANITIZER is None:
+        _PROCESS_SANITIZER = CodeSanitizerTool()
+    return _PROCESS_SANITIZER
+
+
+def _sanitize_file(job: Tuple[str, bool], sanitizer: Optional[CodeSanitizerTool] = None) -> Tuple[str, Optional[SanitizedCode], Optional[str]]:
+    """
+    清理单个文件（进程池工作函数，需位于模块级以便序列化）
+    
+    Args:
+        job: (文件路径, 是否保留重要注释)
+        sanitizer: 清理工具实例，为空时使用本进程共享的实例
+        
+    Returns:
+        (文件路径, 清理结果, 错误信息)
+    """
+    file_path, keep_essential_comments = job
+    sanitizer = sanitizer or _process_sanitizer()
+    try:
+        source_code = _read_source_file(file_path)
+        return file_path, sanitizer.sanitize_solidity_code(source_code, keep_essential_comments), None
+    except Exception as e:
+        return file_path, None, str(e)
+
+
+def sanitize_source(source_code: str, keep_essential_comments: bool = True) -> SanitizedCode:
+    """
+    清理源代码（供进程池调用的模块级函数，进程内复用同一个清理工具实例及其缓存）
+    
+    Args:
+        source_code: 原始源代码
+        keep_essential_comments: 是否保留重要注释
+        
+    Returns:
+        清理后的代码对象
+    """
+    return _process_sanitizer().sanitize_solidity_code(source_code, keep_essential_comments)
+
+
 # 使用示例
 def main():
     """使用示例"""